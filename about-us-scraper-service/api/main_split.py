@@ -1,17 +1,68 @@
 import base64
+import functools
 import hashlib
+import inspect
 import json
 import re
 import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend, Value
+from fastapi_cache.decorator import cache
+
+# Response cache TTLs in seconds
+HEALTH_CACHE_TTL = 60
+TEXT_CACHE_TTL = 30
+# /scrape/text is keyed per target URL, so cap how many responses are held
+RESPONSE_CACHE_MAX_ENTRIES = 256
+# How long, and for how many calls, the last good scrape is kept for
+# X-Cache-Fallback requests
+STALE_CACHE_TTL = 3600
+STALE_CACHE_MAX_ENTRIES = 256
+STALE_WARNING = '110 - "Response is stale"'
+
+PAGE_FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+PAGE_FETCH_TIMEOUT = 10
+
+# Media cursors are plain "m_<index>"; older clients may still send base64("media:<index>")
+MEDIA_CURSOR_PREFIX = "m_"
+
+# Last good scrape responses as key -> (expiry, body), least recently stored first
+_stale_responses: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+# Pooled page-fetch client, opened for the lifetime of the app
+http_client: Optional[httpx.AsyncClient] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared page-fetch client on startup and close it on shutdown"""
+    global http_client
+    http_client = httpx.AsyncClient(
+        headers=PAGE_FETCH_HEADERS,
+        timeout=PAGE_FETCH_TIMEOUT,
+        follow_redirects=True,
+    )
+    try:
+        yield
+    finally:
+        await http_client.aclose()
+        http_client = None
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title="AI Web Scraper API - Split Approach",
     description="""
     🚀 **Ultra-Fast Web Scraping API with Split Endpoints**
@@ -79,6 +130,32 @@ app.add_middleware(
 )
 
 
+class BoundedInMemoryBackend(InMemoryBackend):
+    """
+    InMemoryBackend holding at most max_entries keys.
+
+    The base class only drops an expired key when that key is read again, so
+    the least recently stored entries are evicted once the cap is reached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # Per-instance store; the base class shares one dict across instances
+        self._store = {}
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        async with self._lock:
+            self._store.pop(key, None)
+            self._store[key] = Value(value, self._now + (expire or 0))
+            while len(self._store) > self.max_entries:
+                del self._store[next(iter(self._store))]
+
+
+# In-process response cache. Initialized at import rather than in a lifespan
+# handler so it is ready however the app is driven (Mangum, uvicorn, tests)
+FastAPICache.init(BoundedInMemoryBackend(RESPONSE_CACHE_MAX_ENTRIES), prefix="split")
+
+
 def normalize_url(url: str) -> str:
     """Normalize URL by adding protocol if missing"""
     if not url.startswith(("http://", "https://")):
@@ -86,13 +163,96 @@ def normalize_url(url: str) -> str:
     return url
 
 
-def get_page_content(url: str) -> Tuple[BeautifulSoup, str, int]:
-    """Get page content and parse with BeautifulSoup"""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+def url_key_builder(
+    func,
+    namespace: str = "",
+    *,
+    request=None,
+    response=None,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+) -> str:
+    """Cache key for scrape endpoints: one entry per normalized target URL"""
+    url = kwargs.get("url", args[0] if args else "")
+    return f"{namespace}:{func.__name__}:{normalize_url(url)}"
+
+
+def _stale_key(func, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    """Key for the last good response of a scrape endpoint call"""
+    params = {k: v for k, v in kwargs.items() if not k.startswith("__")}
+    if args:
+        params.setdefault("url", args[0])
+    params["url"] = normalize_url(params.get("url", ""))
+    # Hash so large params (e.g. /scrape/enhance text_data) don't bloat the key
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f"{func.__name__}:{digest}"
+
+
+def stale_fallback(func):
+    """
+    Serve the last good response when a scrape fails and the client opts in.
 
-    response = requests.get(url, headers=headers, timeout=10)
+    The last STALE_CACHE_MAX_ENTRIES successful results are kept for
+    STALE_CACHE_TTL. If the endpoint then raises and the request carries
+    ``X-Cache-Fallback: allow``, the stored body is returned with a
+    ``Warning: 110`` header instead of the error.
+    """
+    # Reuse a Request parameter FastAPI already injects (fastapi-cache adds
+    # one), otherwise ask FastAPI for our own
+    signature = inspect.signature(func)
+    request_param = next(
+        (p for p in signature.parameters.values() if p.annotation is Request), None
+    )
+    inject = request_param is None
+    if inject:
+        request_param = inspect.Parameter(
+            "__stale_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        )
+        signature = signature.replace(
+            parameters=[*signature.parameters.values(), request_param]
+        )
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if inject:
+            request = kwargs.pop(request_param.name, None)
+        else:
+            request = kwargs.get(request_param.name)
+        key = _stale_key(func, args, kwargs)
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            if request is None or request.headers.get("X-Cache-Fallback") != "allow":
+                raise
+            expires, stale = _stale_responses.get(key, (0.0, None))
+            if stale is None or expires < time.monotonic():
+                raise
+            return JSONResponse(stale, headers={"Warning": STALE_WARNING})
+
+        if not isinstance(result, Response):
+            _stale_responses[key] = (time.monotonic() + STALE_CACHE_TTL, result)
+            _stale_responses.move_to_end(key)
+            while len(_stale_responses) > STALE_CACHE_MAX_ENTRIES:
+                _stale_responses.popitem(last=False)
+        return result
+
+    wrapper.__signature__ = signature
+    return wrapper
+
+
+async def get_page_content_async(url: str) -> Tuple[BeautifulSoup, str, int]:
+    """Get page content without blocking the event loop and parse with BeautifulSoup"""
+    if http_client is not None:
+        response = await http_client.get(url)
+    else:
+        # Lifespan not run (e.g. app driven without startup); use a one-off client
+        async with httpx.AsyncClient(
+            headers=PAGE_FETCH_HEADERS,
+            timeout=PAGE_FETCH_TIMEOUT,
+            follow_redirects=True,
+        ) as client:
+            response = await client.get(url)
     response.raise_for_status()
 
     soup = BeautifulSoup(response.content, "html.parser")
@@ -392,8 +552,11 @@ def extract_media_assets(
     start_index = 0
     if cursor:
         try:
-            cursor_data = base64.b64decode(cursor).decode()
-            start_index = int(cursor_data.split(":")[1])
+            if cursor.startswith(MEDIA_CURSOR_PREFIX):
+                start_index = int(cursor[len(MEDIA_CURSOR_PREFIX) :])
+            else:
+                cursor_data = base64.b64decode(cursor).decode()
+                start_index = int(cursor_data.split(":")[1])
         except:
             start_index = 0
 
@@ -404,7 +567,7 @@ def extract_media_assets(
     # Create next cursor
     next_cursor = None
     if end_index < len(all_media):
-        next_cursor = base64.b64encode(f"media:{end_index}".encode()).decode()
+        next_cursor = f"{MEDIA_CURSOR_PREFIX}{end_index}"
 
     # Group by type for summary
     media_summary = {
@@ -431,12 +594,15 @@ def extract_media_assets(
 
 
 @app.get("/health")
+@cache(expire=HEALTH_CACHE_TTL)
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "3.0.0", "approach": "split"}
 
 
 @app.get("/scrape/text")
+@stale_fallback
+@cache(expire=TEXT_CACHE_TTL, key_builder=url_key_builder)
 async def scrape_text_only(url: str):
     """
     ⚡ **LIGHTNING FAST TEXT EXTRACTION**
@@ -488,7 +654,7 @@ async def scrape_text_only(url: str):
 
     try:
         url = normalize_url(url)
-        soup, html_content, status_code = get_page_content(url)
+        soup, html_content, status_code = await get_page_content_async(url)
 
         # Extract company information
         company_data = extract_company_info_programmatic(soup, url)
@@ -513,13 +679,14 @@ async def scrape_text_only(url: str):
             "content_type": "application/json",
         }
 
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
-    except Exception as e:
+    except (KeyError, ValueError) as e:
         raise HTTPException(status_code=500, detail=f"Text extraction failed: {str(e)}")
 
 
 @app.get("/scrape/media")
+@stale_fallback
 async def scrape_media_paginated(
     url: str,
     cursor: Optional[str] = Query(None, description="Pagination cursor for next page"),
@@ -563,7 +730,7 @@ async def scrape_media_paginated(
     GET /scrape/media?url=github.com&limit=20
 
     # Next page using cursor
-    GET /scrape/media?url=github.com&cursor=eyJtZWRpYSI6MjB9&limit=20
+    GET /scrape/media?url=github.com&cursor=m_20&limit=20
 
     # Filter by type
     GET /scrape/media?url=company.com&media_type=image&limit=10
@@ -583,7 +750,7 @@ async def scrape_media_paginated(
 
     try:
         url = normalize_url(url)
-        soup, html_content, status_code = get_page_content(url)
+        soup, html_content, status_code = await get_page_content_async(url)
 
         # Extract media assets with pagination
         media_data = extract_media_assets(soup, url, cursor, limit)
@@ -610,15 +777,16 @@ async def scrape_media_paginated(
             "content_type": "application/json",
         }
 
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
-    except Exception as e:
+    except (KeyError, ValueError) as e:
         raise HTTPException(
             status_code=500, detail=f"Media extraction failed: {str(e)}"
         )
 
 
 @app.get("/scrape/enhance")
+@stale_fallback
 async def enhance_with_ai(
     url: str,
     text_data: Optional[str] = Query(
@@ -680,7 +848,7 @@ async def enhance_with_ai(
             content = text_data
         else:
             # Extract text first
-            soup, html_content, status_code = get_page_content(url)
+            soup, html_content, status_code = await get_page_content_async(url)
             company_data = extract_company_info_programmatic(soup, url)
             content = company_data["content"]
 
@@ -704,9 +872,9 @@ async def enhance_with_ai(
             "content_type": "application/json",
         }
 
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
-    except Exception as e:
+    except (KeyError, ValueError) as e:
         raise HTTPException(status_code=500, detail=f"AI enhancement failed: {str(e)}")
 
 
@@ -4,8 +4,9 @@ Tests for the split API endpoints in the SAM service.
 
 import base64
 import json
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -30,7 +31,7 @@ class TestSAMSplitAPI:
         assert data["version"] == "3.0.0"
         assert data["approach"] == "split"
 
-    @patch("main_split.get_page_content")
+    @patch("main_split.get_page_content_async", new_callable=AsyncMock)
     @patch("main_split.extract_company_info_programmatic")
     @patch("main_split.find_about_pages")
     def test_scrape_text_endpoint(
@@ -81,7 +82,7 @@ class TestSAMSplitAPI:
         assert data["approach_used"] == "programmatic_only"
         assert "processing_time_seconds" in data
 
-    @patch("main_split.get_page_content")
+    @patch("main_split.get_page_content_async", new_callable=AsyncMock)
     @patch("main_split.extract_media_assets")
     def test_scrape_media_endpoint_pagination(
         self, mock_extract_media, mock_get_content, client
@@ -112,7 +113,7 @@ class TestSAMSplitAPI:
                 "has_more": True,
             },
             "pagination": {
-                "next_cursor": base64.b64encode("media:1".encode()).decode(),
+                "next_cursor": "m_1",
                 "has_more": True,
                 "total_count": 5,
                 "current_page_start": 0,
@@ -204,8 +205,9 @@ class TestSAMSplitAPI:
         # Test cursor decoding
         if result["pagination"]["has_more"]:
             cursor = result["pagination"]["next_cursor"]
-            decoded = base64.b64decode(cursor).decode()
-            assert decoded.startswith("media:")
+            if not cursor.startswith("m_"):
+                cursor_data = base64.b64decode(cursor).decode()
+                assert cursor_data.startswith("media:")
 
             # Test using the cursor
             result2 = extract_media_assets(mock_soup, "https://test.com", cursor, 10)
@@ -227,18 +229,22 @@ class TestSplitAPIEndpoints:
 
     def test_text_endpoint_with_invalid_url(self, client):
         """Test text endpoint error handling."""
-        with patch("main_split.get_page_content") as mock_get_content:
-            mock_get_content.side_effect = Exception("Connection failed")
+        with patch(
+            "main_split.get_page_content_async", new_callable=AsyncMock
+        ) as mock_get_content:
+            mock_get_content.side_effect = httpx.ConnectError("Connection failed")
 
             response = client.get("/scrape/text?url=invalid-url")
 
-            assert response.status_code == 500
+            assert response.status_code == 400
             data = response.json()
             assert "detail" in data
 
     def test_media_endpoint_with_type_filter(self, client):
         """Test media endpoint with type filtering."""
-        with patch("main_split.get_page_content") as mock_get_content:
+        with patch(
+            "main_split.get_page_content_async", new_callable=AsyncMock
+        ) as mock_get_content:
             mock_soup = Mock()
             mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
 
@@ -273,7 +279,9 @@ class TestSplitAPIEndpoints:
 
     def test_enhance_endpoint_with_ai(self, client):
         """Test enhance endpoint with AI processing."""
-        with patch("main_split.get_page_content") as mock_get_content:
+        with patch(
+            "main_split.get_page_content_async", new_callable=AsyncMock
+        ) as mock_get_content:
             mock_soup = Mock()
             mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
 
@@ -1,10 +1,91 @@
+import asyncio
 import re
-from typing import Any, Callable, Dict, List, Optional
+import sys
+from contextlib import suppress
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import orjson
 import semver
 from fastapi import FastAPI, Request, Response
 
-from ..utils.logging import log_event
+from ..utils.logging import log_event, logger
+
+# Trie slots: handler and its response headers stored at a path's terminal
+# node, and the child used for parameterized segments such as "/media/{id}"
+_LEAF = object()
+_HEADERS = object()
+_DYN = object()
+
+# Versioned request path: "/v<version>/<path>"
+_VERSION_PATH_RE = re.compile(r"^/v([0-9][^/]*)(/.*)$")
+
+# Pre-encoded error bodies; a fresh Response is still built per request since
+# downstream middleware may mutate response headers in place
+_ERR_INVALID_API_VERSION_FORMAT = orjson.dumps({"error": "Invalid API version format"})
+_ERR_INVALID_VERSION_FORMAT = orjson.dumps({"error": "Invalid version format"})
+_ERR_VERSION_NOT_SUPPORTED = orjson.dumps({"error": "Version not supported"})
+_ERR_NO_COMPATIBLE_HANDLER = orjson.dumps({"error": "No compatible handler found"})
+
+# Request log queue bounds; events are dropped rather than blocking requests
+_LOG_QUEUE_SIZE = 10000
+_LOG_BATCH_SIZE = 100
+
+
+def _split_path(path: str) -> List[str]:
+    """Split a path into interned, non-empty segments"""
+    return [sys.intern(segment) for segment in path.split("/") if segment]
+
+
+def _match_segments(node: dict, segments: List[str], index: int) -> Optional[dict]:
+    """
+    Find the leaf for segments[index:] below node.
+
+    Static segments win over parameterized ones, but if the static branch
+    dead-ends the "{param}" child is tried instead.
+    """
+    if index == len(segments):
+        return node if _LEAF in node else None
+
+    static = node.get(segments[index])
+    if static is not None:
+        leaf = _match_segments(static, segments, index + 1)
+        if leaf is not None:
+            return leaf
+
+    dynamic = node.get(_DYN)
+    if dynamic is not None:
+        return _match_segments(dynamic, segments, index + 1)
+    return None
+
+
+def _error_response(content: bytes, status_code: int) -> Response:
+    """Build a JSON error response from a pre-encoded body"""
+    return Response(
+        content=content, status_code=status_code, media_type="application/json"
+    )
+
+
+def _drain_log_queue(queue: asyncio.Queue, batch: List[Dict[str, Any]]) -> None:
+    """Move queued events into batch without waiting, up to the batch size"""
+    while len(batch) < _LOG_BATCH_SIZE and not queue.empty():
+        batch.append(queue.get_nowait())
+
+
+def _log_batch(batch: List[Dict[str, Any]]) -> None:
+    """Log a batch of request events, never letting a logging error escape"""
+    try:
+        log_event("api_request_batch", {"requests": batch})
+    except Exception:
+        logger.exception("Failed to log %d queued API request events", len(batch))
+
+
+async def _log_consumer(queue: asyncio.Queue) -> None:
+    """Log queued request events in batches off the request path"""
+    while True:
+        batch = [await queue.get()]
+        _drain_log_queue(queue, batch)
+        _log_batch(batch)
 
 
 class VersionManager:
@@ -25,9 +106,22 @@ class VersionManager:
         self.current_version = semver.VersionInfo.parse(current_version)
         self.min_version = semver.VersionInfo.parse(min_version)
         self.max_version = semver.VersionInfo.parse(max_version)
+        self._current_version_str = str(self.current_version)
+
+        # Plain tuples compare faster than VersionInfo on every request
+        self._min_t = (
+            self.min_version.major,
+            self.min_version.minor,
+            self.min_version.patch,
+        )
+        self._max_t = (
+            self.max_version.major,
+            self.max_version.minor,
+            self.max_version.patch,
+        )
 
-        # Store version-specific handlers
-        self.handlers: Dict[str, Dict[str, Callable]] = {}
+        # Store version-specific handlers as a path-segment trie per version
+        self.handlers: Dict[str, dict] = {}
 
         # Store deprecation notices
         self.deprecation_notices: Dict[str, str] = {}
@@ -48,19 +142,34 @@ class VersionManager:
             handler: Handler function
             deprecation_notice: Optional deprecation notice
         """
-        if version not in self.handlers:
-            self.handlers[version] = {}
-
-        self.handlers[version][path] = handler
+        node = self.handlers.setdefault(version, {})
+        for segment in _split_path(path):
+            if segment.startswith("{") and segment.endswith("}"):
+                segment = _DYN
+            node = node.setdefault(segment, {})
+        node[_LEAF] = handler
+
+        # Response headers are fixed per registration, so build them once
+        headers = {
+            "X-API-Version": version,
+            "X-API-Latest-Version": self._current_version_str,
+        }
+        if deprecation_notice:
+            headers["Warning"] = f'299 - "{deprecation_notice}"'
+        node[_HEADERS] = headers
 
         if deprecation_notice:
             self.deprecation_notices[f"{version}:{path}"] = deprecation_notice
 
+    def _find_leaf(self, version: str, segments: List[str]) -> Optional[dict]:
+        """Walk the version's trie along already-split path segments"""
+        node = self.handlers.get(version)
+        return _match_segments(node, segments, 0) if node is not None else None
+
     def get_handler(self, version: str, path: str) -> Optional[Callable]:
         """Get handler for specific version and path"""
-        if version in self.handlers and path in self.handlers[version]:
-            return self.handlers[version][path]
-        return None
+        leaf = self._find_leaf(version, _split_path(path))
+        return leaf[_LEAF] if leaf else None
 
     def get_deprecation_notice(self, version: str, path: str) -> Optional[str]:
         """Get deprecation notice for specific version and path"""
@@ -80,21 +189,44 @@ class VersionManager:
 
     def is_version_supported(self, version: semver.VersionInfo) -> bool:
         """Check if version is supported"""
-        return self.min_version <= version < self.max_version
+        if version.prerelease:
+            # Prereleases sort below their release, like in resolve_handler
+            return self.min_version <= version < self.max_version
+        return (
+            self._min_t <= (version.major, version.minor, version.patch) < self._max_t
+        )
 
     def get_latest_compatible_version(
         self, path: str, requested_version: semver.VersionInfo
     ) -> Optional[str]:
         """Get latest compatible version for path"""
-        compatible_versions = []
+        resolved = self.resolve_handler(_split_path(path), requested_version)
+        return resolved[0] if resolved else None
+
+    def resolve_handler(
+        self, segments: List[str], requested_version: semver.VersionInfo
+    ) -> Optional[Tuple[str, Callable, Dict[str, str]]]:
+        """
+        Get latest compatible version for split path segments
+
+        Returns:
+            Tuple of version, handler and response headers, or None
+        """
+        latest = None
 
         for version in self.handlers.keys():
             version_obj = semver.VersionInfo.parse(version)
-            if version_obj <= requested_version and path in self.handlers[version]:
-                compatible_versions.append(version_obj)
-
-        if compatible_versions:
-            return str(max(compatible_versions))
+            if version_obj > requested_version:
+                continue
+            if latest is not None and version_obj <= latest[0]:
+                continue
+            leaf = self._find_leaf(version, segments)
+            if leaf is not None:
+                latest = (version_obj, version, leaf)
+
+        if latest:
+            _, version, leaf = latest
+            return version, leaf[_LEAF], leaf[_HEADERS]
 
         return None
 
@@ -111,88 +243,55 @@ class VersionedAPI:
         self.app = app
         self.version_manager = version_manager
 
+        # Set while the background log consumer runs; log inline otherwise
+        self.log_queue: Optional[asyncio.Queue] = None
+
     async def handle_request(self, request: Request) -> Response:
         """Handle versioned request"""
         # Extract version from path
-        path_parts = request.url.path.split("/")
-        if len(path_parts) < 3 or not path_parts[1].startswith("v"):
-            return Response(
-                content='{"error": "Invalid API version format"}',
-                status_code=400,
-                media_type="application/json",
-            )
+        match = _VERSION_PATH_RE.match(request.url.path)
+        if match is None:
+            return _error_response(_ERR_INVALID_API_VERSION_FORMAT, 400)
 
-        version_str = path_parts[1][1:]  # Remove 'v' prefix
-        path = "/" + "/".join(path_parts[2:])
+        version_str, path = match.group(1), match.group(2)
+        segments = _split_path(path)
 
         # Parse and validate version
         version = self.version_manager.parse_version(version_str)
         if not version:
-            return Response(
-                content='{"error": "Invalid version format"}',
-                status_code=400,
-                media_type="application/json",
-            )
+            return _error_response(_ERR_INVALID_VERSION_FORMAT, 400)
 
         if not self.version_manager.is_version_supported(version):
-            return Response(
-                content='{"error": "Version not supported"}',
-                status_code=400,
-                media_type="application/json",
-            )
-
-        # Get latest compatible version
-        latest_version = self.version_manager.get_latest_compatible_version(
-            path, version
-        )
+            return _error_response(_ERR_VERSION_NOT_SUPPORTED, 400)
 
-        if not latest_version:
-            return Response(
-                content='{"error": "No compatible handler found"}',
-                status_code=404,
-                media_type="application/json",
-            )
-
-        # Get handler
-        handler = self.version_manager.get_handler(latest_version, path)
-        if not handler:
-            return Response(
-                content='{"error": "Handler not found"}',
-                status_code=404,
-                media_type="application/json",
-            )
-
-        # Check for deprecation
-        deprecation_notice = self.version_manager.get_deprecation_notice(
-            latest_version, path
-        )
+        # Get latest compatible version and its handler in a single trie walk
+        resolved = self.version_manager.resolve_handler(segments, version)
 
-        # Add version headers
-        headers = {
-            "X-API-Version": latest_version,
-            "X-API-Latest-Version": str(self.version_manager.current_version),
-        }
+        if not resolved:
+            return _error_response(_ERR_NO_COMPATIBLE_HANDLER, 404)
 
-        if deprecation_notice:
-            headers["Warning"] = f'299 - "{deprecation_notice}"'
+        latest_version, handler, headers = resolved
 
         # Log request
-        log_event(
-            "api_request",
-            {
-                "path": path,
-                "requested_version": version_str,
-                "used_version": latest_version,
-                "deprecated": bool(deprecation_notice),
-            },
-        )
+        event = {
+            "path": path,
+            "requested_version": version_str,
+            "used_version": latest_version,
+            "deprecated": "Warning" in headers,
+        }
+        if self.log_queue is None:
+            log_event("api_request", event)
+        else:
+            # Stamp now; the batch is only logged later
+            event["timestamp"] = datetime.now().isoformat()
+            with suppress(asyncio.QueueFull):
+                self.log_queue.put_nowait(event)
 
         # Call handler
         response = await handler(request)
 
         # Add version headers to response
-        for key, value in headers.items():
-            response.headers[key] = value
+        response.headers.update(headers)
 
         return response
 
@@ -222,10 +321,34 @@ def setup_versioning(
     )
 
     versioned_api = VersionedAPI(app, version_manager)
+    log_consumer_task: Optional[asyncio.Task] = None
+
+    async def start_log_consumer():
+        nonlocal log_consumer_task
+        versioned_api.log_queue = asyncio.Queue(maxsize=_LOG_QUEUE_SIZE)
+        log_consumer_task = asyncio.create_task(_log_consumer(versioned_api.log_queue))
+
+    async def stop_log_consumer():
+        queue, versioned_api.log_queue = versioned_api.log_queue, None
+        if log_consumer_task is not None:
+            log_consumer_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await log_consumer_task
+
+        # Flush whatever was still queued at shutdown
+        while queue is not None and not queue.empty():
+            batch: List[Dict[str, Any]] = []
+            _drain_log_queue(queue, batch)
+            _log_batch(batch)
+
+    app.router.add_event_handler("startup", start_log_consumer)
+    app.router.add_event_handler("shutdown", stop_log_consumer)
 
     @app.middleware("http")
     async def version_middleware(request: Request, call_next):
-        if request.url.path.startswith("/v"):
+        # Cheap byte check on the raw ASGI path before building request.url
+        path = request.scope.get("raw_path") or request.scope["path"].encode()
+        if path[:2] == b"/v" and (len(path) < 3 or path[2:3].isdigit()):
             return await versioned_api.handle_request(request)
         return await call_next(request)
 
@@ -2,15 +2,52 @@
 import streamlit as st
 import requests
 import os
-import json
+import orjson
+import hashlib
+import shutil
+import tempfile
 from urllib.parse import urljoin, urlparse
 from scrapegraphai.graphs import SmartScraperGraph
 import base64
 from io import BytesIO
 from PIL import Image
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 import re
 
+# Number of media files downloaded concurrently
+MEDIA_DOWNLOAD_WORKERS = 16
+
+# Result keys whose string values are treated as media URLs
+MEDIA_KEYS = {'image', 'img', 'logo', 'photo', 'picture', 'icon', 'video', 'movie', 'clip', 'media'}
+
+# Most media items collected from a single page's HTML
+MAX_HTML_MEDIA = 50
+
+# Media file extensions, at the end of a URL or before its query/fragment
+_MEDIA_EXT_RE = re.compile(r'\.(jpe?g|png|gif|svg|webp|mp4|webm|avi|mov|mkv|flv|m4v)(?:[?#]|$)', re.I)
+_VIDEO_EXT_RE = re.compile(r'\.(mp4|webm|avi|mov|mkv|flv|m4v)$', re.I)
+
+# Navigation list classes and inline CSS background images
+_NAV_CLASS_RE = re.compile(r'nav|menu', re.I)
+_BG_IMG_RE = re.compile(r'background-image:\s*url\(["\']?([^"\']+)["\']?\)')
+
+# Only parse the tags the About page link scan inspects
+_NAV_TAGS_STRAINER = SoupStrainer(['a', 'nav', 'header', 'menu', 'ul'])
+
+def _keyword_matcher(keywords):
+    """Compile keywords into one case-insensitive pattern scanned in a single pass"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.I)
+
+# Keyword sets used to classify images and locate About pages
+_BRANDING_KEYWORDS_RE = _keyword_matcher(['logo', 'brand', 'company', 'team', 'about', 'founder', 'staff', 'office'])
+_UI_ELEMENT_KEYWORDS_RE = _keyword_matcher(['icon', 'button', 'arrow', 'cart', 'search', 'menu'])
+_ABOUT_CONTENT_KEYWORDS_RE = _keyword_matcher(['about us', 'our story', 'our team', 'our company', 'founded'])
+_ABOUT_LINK_KEYWORDS_RE = _keyword_matcher(['about', 'about-us', 'about_us', 'company', 'our-story', 'our-team', 'team', 'story'])
+_ABOUT_LINK_PHRASES_RE = _keyword_matcher(['about us', 'about', 'our story', 'our team', 'company'])
+
 # Set up the Streamlit app
 st.title("Web Scrapping AI Agent 🕵️‍♂️")
 st.caption("This app allows you to scrape a website using OpenAI API and display media content")
@@ -31,212 +68,281 @@ st.markdown("""
 if not os.path.exists("scraped_media"):
     os.makedirs("scraped_media")
 
-def download_media(media_url, base_url, session=None):
-    """Download media (image or video) from URL and return the local path"""
-    try:
-        # Handle relative URLs
-        if not media_url.startswith(('http://', 'https://')):
-            media_url = urljoin(base_url, media_url)
-        
-        # Use session if provided, otherwise create a new request
-        if session:
-            response = session.get(media_url, timeout=30, stream=True)
-        else:
-            response = requests.get(media_url, timeout=30, stream=True)
-        
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so media downloads reuse pooled connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_media_type(file_name):
+    """Classify a saved media file as 'video' or 'image' by its extension"""
+    return 'video' if _VIDEO_EXT_RE.search(file_name) else 'image'
+
+def fetch_media(media_url, base_url, session=None):
+    """Download media from URL without UI reporting; raises on request errors"""
+    # Handle relative URLs
+    if not media_url.startswith(('http://', 'https://')):
+        media_url = urljoin(base_url, media_url)
+    
+    # Stable per-URL digest so different URLs never share a file name
+    url_hash = hashlib.blake2b(media_url.encode('utf-8'), digest_size=6).hexdigest()
+    
+    # Get file extension from URL
+    parsed_url = urlparse(media_url)
+    file_name = os.path.basename(parsed_url.path)
+    
+    # Skip the download entirely if this URL was already saved
+    if file_name and '.' in file_name:
+        file_name = f"{url_hash}_{file_name}"
+        file_path = os.path.join("scraped_media", file_name)
+        if os.path.exists(file_path):
+            return file_path, media_url, get_media_type(file_name)
+    
+    # Use session if provided, otherwise create a new request; the with block
+    # releases the streamed connection back to the pool on every path
+    get = session.get if session else requests.get
+    with get(media_url, timeout=30, stream=True) as response:
         if response.status_code == 200:
-            # Get file extension from URL
-            parsed_url = urlparse(media_url)
-            file_name = os.path.basename(parsed_url.path)
-            
             # Determine file type and set appropriate extension
             content_type = response.headers.get('content-type', '').lower()
             if not file_name or '.' not in file_name:
                 if 'video' in content_type:
                     if 'mp4' in content_type:
-                        file_name = f"video_{hash(media_url) % 10000}.mp4"
+                        file_name = f"video_{url_hash}.mp4"
                     elif 'webm' in content_type:
-                        file_name = f"video_{hash(media_url) % 10000}.webm"
+                        file_name = f"video_{url_hash}.webm"
                     elif 'avi' in content_type:
-                        file_name = f"video_{hash(media_url) % 10000}.avi"
+                        file_name = f"video_{url_hash}.avi"
                     else:
-                        file_name = f"video_{hash(media_url) % 10000}.mp4"
+                        file_name = f"video_{url_hash}.mp4"
                 else:
-                    file_name = f"image_{hash(media_url) % 10000}.jpg"
-            
-            # Save the media file
+                    file_name = f"image_{url_hash}.jpg"
+        
+            # Save to a temp file first so a failed download never leaves a partial
+            # file under the name the cache check above trusts
             file_path = os.path.join("scraped_media", file_name)
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            # Determine media type
-            file_ext = file_name.lower().split('.')[-1]
-            media_type = 'video' if file_ext in ['mp4', 'webm', 'avi', 'mov', 'mkv', 'flv', 'm4v'] else 'image'
-            
-            return file_path, media_url, media_type
-    except Exception as e:
-        st.warning(f"Could not download media from {media_url}: {str(e)}")
+            response.raw.decode_content = True
+            fd, tmp_path = tempfile.mkstemp(dir="scraped_media", suffix=".part")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 16)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        
+            return file_path, media_url, get_media_type(file_name)
     
-    return None, media_url, 'unknown'
+        return None, media_url, 'unknown'
 
-def extract_media_from_html(url):
+def download_media_batch(media_items, base_url):
+    """Download (media_url, context) pairs concurrently over the shared session"""
+    session = get_http_session()
+    
+    def fetch(media_url):
+        # Streamlit calls only work on the script thread, so report errors later
+        try:
+            return fetch_media(media_url, base_url, session), None
+        except Exception as e:
+            return (None, media_url, 'unknown'), e
+    
+    # Downloads start while the caller is still producing items
+    with ThreadPoolExecutor(max_workers=MEDIA_DOWNLOAD_WORKERS) as executor:
+        submitted = [(media_url, context, executor.submit(fetch, media_url)) for media_url, context in media_items]
+    
+    downloaded_media = []
+    for media_url, context, future in submitted:
+        (local_path, original_url, media_type), error = future.result()
+        if error is not None:
+            st.warning(f"Could not download media from {media_url}: {str(error)}")
+        elif local_path:
+            downloaded_media.append((local_path, original_url, context, media_type))
+    return downloaded_media
+
+def _handle_img(tag, media_urls):
+    """Collect an <img> that looks like branding or content imagery"""
+    src = tag.get('src') or tag.get('data-src') or tag.get('data-lazy-src')
+    if src:
+        # Filter for likely branding/company images
+        alt_text = (tag.get('alt') or '').lower()
+        
+        # Look for logos, company images, team photos
+        if _BRANDING_KEYWORDS_RE.search(alt_text) or _BRANDING_KEYWORDS_RE.search(src):
+            media_urls.append((src, 'image', f"Image: {alt_text or 'Company image'}"))
+        # Also include images that seem to be content images (not UI elements)
+        elif not _UI_ELEMENT_KEYWORDS_RE.search(src):
+            media_urls.append((src, 'image', f"Image: {alt_text or 'Content image'}"))
+
+def _handle_video(tag, media_urls):
+    """Collect a <video> or <source> URL"""
+    src = tag.get('src')
+    if src:
+        media_urls.append((src, 'video', "Video content"))
+
+def _handle_background(tag, media_urls):
+    """Collect CSS background images from an inline style"""
+    style = tag.get('style')
+    if style:
+        for bg_url in _BG_IMG_RE.findall(style):
+            media_urls.append((bg_url, 'image', "Background image"))
+
+# Per-tag dispatch for the single streaming pass over a page
+_MEDIA_TAG_HANDLERS = {
+    'img': _handle_img,
+    'video': _handle_video,
+    'source': _handle_video,
+    'div': _handle_background,
+    'section': _handle_background,
+    'header': _handle_background,
+}
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _extract_media_from_html(url, max_media):
+    """Extract media URLs from a page; errors propagate so they aren't cached"""
+    with requests.get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        media_urls = []
+        
+        # Stream the page and stop as soon as enough media is found
+        for event, tag in etree.iterparse(response.raw, events=('start', 'end'), html=True):
+            if event == 'end':
+                # Drop finished subtrees so memory stays flat on large pages
+                tag.clear(keep_tail=True)
+                continue
+            
+            handler = _MEDIA_TAG_HANDLERS.get(tag.tag)
+            if handler is not None:
+                handler(tag, media_urls)
+                if len(media_urls) >= max_media:
+                    break
+        
+        return media_urls[:max_media]
+
+def extract_media_from_html(url, max_media=MAX_HTML_MEDIA):
     """Extract media URLs directly from HTML"""
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            media_urls = []
-            
-            # Find images
-            img_tags = soup.find_all('img')
-            for img in img_tags:
-                src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                if src:
-                    # Filter for likely branding/company images
-                    alt_text = (img.get('alt') or '').lower()
-                    src_lower = src.lower()
-                    
-                    # Look for logos, company images, team photos
-                    if any(keyword in alt_text or keyword in src_lower for keyword in 
-                           ['logo', 'brand', 'company', 'team', 'about', 'founder', 'staff', 'office']):
-                        media_urls.append((src, 'image', f"Image: {alt_text or 'Company image'}"))
-                    # Also include images that seem to be content images (not UI elements)
-                    elif not any(ui_element in src_lower for ui_element in 
-                                ['icon', 'button', 'arrow', 'cart', 'search', 'menu']):
-                        media_urls.append((src, 'image', f"Image: {alt_text or 'Content image'}"))
-            
-            # Find videos
-            video_tags = soup.find_all(['video', 'source'])
-            for video in video_tags:
-                src = video.get('src')
-                if src:
-                    media_urls.append((src, 'video', "Video content"))
-            
-            # Find background images in CSS
-            style_tags = soup.find_all(['div', 'section', 'header'], style=True)
-            for tag in style_tags:
-                style = tag.get('style', '')
-                bg_matches = re.findall(r'background-image:\s*url\(["\']?([^"\']+)["\']?\)', style)
-                for bg_url in bg_matches:
-                    media_urls.append((bg_url, 'image', "Background image"))
-            
-            return media_urls
+        return _extract_media_from_html(url, max_media)
     except Exception as e:
         st.warning(f"Could not extract media from HTML: {str(e)}")
+        return []
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _find_about_page(base_url):
+    """Find the About Us page URL; errors propagate so they aren't cached"""
+    # Parse the base URL to get the domain
+    parsed_url = urlparse(base_url)
+    domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    
+    # First, try the provided URL - it might already be good
+    try:
+        response = requests.get(base_url, timeout=10)
+        if response.status_code == 200:
+            # Check if this page already has about content
+            soup = BeautifulSoup(response.content, 'lxml')
+            if _ABOUT_CONTENT_KEYWORDS_RE.search(soup.get_text()):
+                return base_url
+    except:
+        pass
+    
+    # If not, try to find about pages
+    response = requests.get(domain, timeout=10)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.content, 'lxml', parse_only=_NAV_TAGS_STRAINER)
+    
+    # Priority search - look in navigation areas first
+    nav_areas = soup.find_all(['nav', 'header', 'menu']) + soup.find_all('ul', class_=_NAV_CLASS_RE)
+    
+    for nav in nav_areas:
+        links = nav.find_all('a', href=True)
+        for link in links:
+            # Check if this looks like an about page
+            if _ABOUT_LINK_KEYWORDS_RE.search(link['href']) or _ABOUT_LINK_KEYWORDS_RE.search(link.get_text()):
+                full_url = urljoin(domain, link['href'])
+                return full_url
     
-    return []
+    # If not found in nav, search all links
+    all_links = soup.find_all('a', href=True)
+    for link in all_links:
+        # More specific matching for about pages
+        if _ABOUT_LINK_KEYWORDS_RE.search(link['href']) or _ABOUT_LINK_PHRASES_RE.search(link.get_text()):
+            full_url = urljoin(domain, link['href'])
+            return full_url
+            
+    # Check for common about page paths
+    common_paths = [
+        '/about', '/about-us', '/about_us', '/company', '/our-story', '/our-team', 
+        '/pages/about', '/pages/about-us', '/about/', '/company/', '/story/',
+        '/en/about', '/home/about', '/site/about'
+    ]
+    
+    # Probe all paths at once and take the first one that answers 200
+    session = get_http_session()
+    executor = ThreadPoolExecutor(max_workers=len(common_paths))
+    try:
+        futures = {}
+        for path in common_paths:
+            test_url = urljoin(domain, path)
+            future = executor.submit(session.head, test_url, timeout=5, allow_redirects=True)
+            futures[future] = test_url
+        for future in as_completed(futures):
+            try:
+                if future.result().status_code == 200:
+                    return futures[future]
+            except Exception:
+                continue
+    finally:
+        # Don't wait on the slower probes once we have an answer
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+    return base_url
 
 def find_about_page(base_url):
     """Try to find About Us page if not directly provided"""
     try:
-        # Parse the base URL to get the domain
-        parsed_url = urlparse(base_url)
-        domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
-        
-        # First, try the provided URL - it might already be good
-        try:
-            response = requests.get(base_url, timeout=10)
-            if response.status_code == 200:
-                # Check if this page already has about content
-                soup = BeautifulSoup(response.content, 'html.parser')
-                page_text = soup.get_text().lower()
-                if any(keyword in page_text for keyword in ['about us', 'our story', 'our team', 'our company', 'founded']):
-                    return base_url
-        except:
-            pass
-        
-        # If not, try to find about pages
-        response = requests.get(domain, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for about links in navigation
-            about_keywords = ['about', 'about-us', 'about_us', 'company', 'our-story', 'our-team', 'team', 'story']
-            
-            # Priority search - look in navigation areas first
-            nav_areas = soup.find_all(['nav', 'header', 'menu']) + soup.find_all('ul', class_=re.compile(r'nav|menu', re.I))
-            
-            for nav in nav_areas:
-                links = nav.find_all('a', href=True)
-                for link in links:
-                    href = link['href'].lower()
-                    link_text = link.get_text().lower().strip()
-                    
-                    # Check if this looks like an about page
-                    if any(keyword in href or keyword in link_text for keyword in about_keywords):
-                        full_url = urljoin(domain, link['href'])
-                        return full_url
-            
-            # If not found in nav, search all links
-            all_links = soup.find_all('a', href=True)
-            for link in all_links:
-                href = link['href'].lower()
-                link_text = link.get_text().lower().strip()
-                
-                # More specific matching for about pages
-                if (any(keyword in href for keyword in about_keywords) or 
-                    any(phrase in link_text for phrase in ['about us', 'about', 'our story', 'our team', 'company'])):
-                    full_url = urljoin(domain, link['href'])
-                    return full_url
-                    
-            # Check for common about page paths
-            common_paths = [
-                '/about', '/about-us', '/about_us', '/company', '/our-story', '/our-team', 
-                '/pages/about', '/pages/about-us', '/about/', '/company/', '/story/',
-                '/en/about', '/home/about', '/site/about'
-            ]
-            
-            for path in common_paths:
-                test_url = urljoin(domain, path)
-                try:
-                    test_response = requests.head(test_url, timeout=5)
-                    if test_response.status_code == 200:
-                        return test_url
-                except:
-                    continue
-                    
+        return _find_about_page(base_url)
     except Exception as e:
         st.warning(f"Could not search for about page: {str(e)}")
-    
-    return base_url
+        return base_url
 
-def display_media_content(result, base_url):
-    """Process and display media content from scraping results"""
-    downloaded_media = []
-    
-    def process_content(content, path=""):
-        """Recursively process content to find and download media"""
-        if isinstance(content, dict):
-            for key, value in content.items():
+def iter_media_candidates(content):
+    """Walk scraped content and yield (media_url, path) for each media reference"""
+    stack = [(content, "", False)]
+    while stack:
+        node, path, is_media_value = stack.pop()
+        if is_media_value:
+            yield node, path
+        elif isinstance(node, dict):
+            children = []
+            for key, value in node.items():
                 current_path = f"{path}.{key}" if path else key
-                if key.lower() in ['image', 'img', 'logo', 'photo', 'picture', 'icon', 'video', 'movie', 'clip', 'media'] and isinstance(value, str):
-                    # This looks like a media URL
-                    local_path, original_url, media_type = download_media(value, base_url)
-                    if local_path:
-                        downloaded_media.append((local_path, original_url, current_path, media_type))
+                if isinstance(value, str):
+                    if key.lower() in MEDIA_KEYS:
+                        # This looks like a media URL
+                        children.append((value, current_path, True))
                 elif isinstance(value, (dict, list)):
-                    process_content(value, current_path)
-        elif isinstance(content, list):
-            for i, item in enumerate(content):
-                current_path = f"{path}[{i}]"
-                process_content(item, current_path)
-        elif isinstance(content, str):
+                    children.append((value, current_path, False))
+            # Push in reverse so items come out in document order
+            stack.extend(reversed(children))
+        elif isinstance(node, list):
+            stack.extend(reversed([(item, f"{path}[{i}]", False) for i, item in enumerate(node)]))
+        elif isinstance(node, str):
             # Check if the string looks like a media URL
-            media_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.mp4', '.webm', '.avi', '.mov', '.mkv', '.flv', '.m4v']
-            if any(ext in content.lower() for ext in media_extensions):
-                local_path, original_url, media_type = download_media(content, base_url)
-                if local_path:
-                    downloaded_media.append((local_path, original_url, path, media_type))
-    
+            if _MEDIA_EXT_RE.search(node):
+                yield node, path
+
+def display_media_content(result, base_url):
+    """Process and display media content from scraping results"""
     # Process the result to find media
     if isinstance(result, dict) and 'content' in result:
-        process_content(result['content'])
+        content = result['content']
     else:
-        process_content(result)
+        content = result
     
-    return downloaded_media
+    return download_media_batch(iter_media_candidates(content), base_url)
 
 # Get OpenAI API key from user
 openai_access_token = st.text_input("OpenAI API Key", type="password")
@@ -353,10 +459,9 @@ if openai_access_token:
                         html_media = extract_media_from_html(scrape_url)
                         
                         # Download HTML-found media
-                        for media_url, media_type, context in html_media:
-                            local_path, original_url, detected_type = download_media(media_url, scrape_url)
-                            if local_path:
-                                downloaded_media.append((local_path, original_url, context, detected_type))
+                        downloaded_media.extend(download_media_batch(
+                            ((media_url, context) for media_url, _, context in html_media), scrape_url
+                        ))
                     
                     if downloaded_media:
                         # Separate images and videos
@@ -429,7 +534,7 @@ if openai_access_token:
             
             # Show raw result for debugging
             with st.expander("🔍 Raw Scraping Result"):
-                st.code(json.dumps(result, indent=2) if isinstance(result, dict) else str(result))
+                st.code(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode() if isinstance(result, dict) else str(result))
 
 # Add instructions
 st.sidebar.title("📖 Instructions")
@@ -0,0 +1,10 @@
+"""
+Plain helper functions shared by the API test modules.
+"""
+
+import orjson
+
+
+def json_body(response):
+    """Decode a test client response body with orjson."""
+    return orjson.loads(response.content)
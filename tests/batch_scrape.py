@@ -1,14 +1,31 @@
-import json
+import asyncio
+import atexit
+import hashlib
 import logging
+import logging.handlers
 import os
+import queue
+import time
+from pathlib import Path
 
+import aiofiles
+import diskcache
+import orjson
+import requests
 from scrapegraphai.graphs import SmartScraperGraph
 
-logging.basicConfig(
-    filename="scrape_test.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
+# Records are queued here and written to disk by a listener thread, so file
+# I/O never stalls the scrape loop
+_log_file_handler = logging.FileHandler("scrape_test.log")
+_log_file_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 )
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(_log_queue))
+logging.getLogger().setLevel(logging.INFO)
 
 # Load OPENAI_API_KEY from environment
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
@@ -23,29 +40,184 @@ graph_config = {
 }
 
 
-def batch_scrape(urls, prompt, config):
+# Use default prompt from ai_scrapper.py; variants are assembled once at import.
+# Every variant starts with the shared default prompt and only appends its own
+# instructions, so providers can reuse the cached prompt prefix across variants
+DEFAULT_PROMPT = """Please extract information from the provided website to create a company profile. Organize the extracted content into the following four distinct sections, ensuring each section is clearly delineated and contains relevant details: About Us (including locations): This section should provide a concise overview of the company, its mission, and its primary activities. Crucially, identify and list all physical locations associated with the company. Our Culture: Describe the core values, working environment, and overall ethos of the company. Look for descriptions of how the company operates, its philosophy, and what it emphasizes in its internal and external interactions. Our Team: Identify key individuals, leadership, or significant roles within the company. If specific team members are highlighted, include their names and relevant contributions or backgrounds. Noteworthy & Differentiated: This section is for unique selling propositions, special features, awards, or any aspects that make the company stand out from its competitors. Look for innovative services, unique offerings, or distinctive operational models. For each section, aim for clear, descriptive language. The overall profile should be comprehensive yet concise, suitable for a mobile app experience. Pay close attention to details that highlight the company's identity and what makes it unique. Keep the response less than 500 words. Additionally, extract any media (videos and images) that are relevant to company branding (i.e. logos, and media about the company). These images will be used to populate an about-us section for the given company in a recruiting app. Respond in strict JSON format with two main keys: 'profile' (an object with the four sections as keys, each containing a string description) and 'media' (an array of objects, each with 'url' and 'type' ('image' or 'video'))."""
+
+PROMPTS = {
+    "Prompt1": DEFAULT_PROMPT
+    + """ Output ONLY valid JSON. Do not include any additional text, explanations, or wrappers. Ensure the JSON is parseable without errors.""",
+    "Prompt2": DEFAULT_PROMPT
+    + """ Example output: {'profile': {'About Us (including locations)': 'Description...', 'Our Culture': 'Description...', 'Our Team': 'Description...', 'Noteworthy & Differentiated': 'Description...'}, 'media': [{'url': 'http://example.com/logo.png', 'type': 'image'}]}. Follow this structure exactly.""",
+    "Prompt3": DEFAULT_PROMPT
+    + """ If a section or media is unavailable, use 'Not available' for strings or empty array for media. Ensure all four profile keys are always present.""",
+}
+
+
+# Keys every scraped result must contain to count as valid
+REQUIRED_PROFILE_KEYS = frozenset(
+    {
+        "About Us (including locations)",
+        "Our Culture",
+        "Our Team",
+        "Noteworthy & Differentiated",
+    }
+)
+REQUIRED_MEDIA_KEYS = frozenset({"url", "type"})
+
+# Scrapes allowed in flight at once
+MAX_CONCURRENT_SCRAPES = 10
+
+# Scrape results persisted across runs so repeated prompt tests skip the LLM
+scrape_cache = diskcache.Cache("./.scrape_cache")
+SCRAPE_CACHE_TTL = 86400
+
+# Pages are fetched once here and shared by every prompt variant
+http_session = requests.Session()
+HTML_FETCH_TIMEOUT = 30
+
+
+def _is_overload(exc):
+    # Rate limits, server errors and timeouts mean the backend wants less load
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, requests.Timeout)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(
+        getattr(exc, "response", None), "status_code", None
+    )
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+class AdaptiveSemaphore:
+    """Concurrency limit that backs off under load (AIMD).
+
+    The limit halves whenever a call fails with an overload error and grows
+    by one after a full limit's worth of consecutive successes, never going
+    above the starting value. Call latency is tracked as an EWMA.
+    """
+
+    def __init__(self, limit, min_limit=1, alpha=0.1):
+        self.limit = limit
+        self.max_limit = limit
+        self.min_limit = min_limit
+        self.alpha = alpha
+        self.latency_ewma = None
+        self._in_flight = 0
+        self._successes = 0
+        self._started = {}
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        self._started[asyncio.current_task()] = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        latency = time.monotonic() - self._started.pop(asyncio.current_task())
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+
+        if exc is not None and _is_overload(exc):
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._successes = 0
+        elif exc is None:
+            self._successes += 1
+            if self._successes >= self.limit:
+                self.limit = min(self.max_limit, self.limit + 1)
+                self._successes = 0
+
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+        return False
+
+
+# Idle scraper graphs per (prompt, model). Building a graph sets up the LLM
+# and node chain, so graphs are reused for later pages by rebinding .source;
+# each graph is only ever run by one worker thread at a time
+_graph_pool = {}
+
+
+def _cache_key(url, prompt, config):
+    key = f"{url}\0{prompt}\0{config['llm']['model']}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _fetch_html(url):
+    key = f"html\0{url}"
+    html = scrape_cache.get(key)
+    if html is None:
+        response = http_session.get(url, timeout=HTML_FETCH_TIMEOUT)
+        response.raise_for_status()
+        html = response.text
+        scrape_cache.set(key, html, expire=SCRAPE_CACHE_TTL)
+    return html
+
+
+def _run_scraper(url, prompt, config):
+    key = _cache_key(url, prompt, config)
+    cached = scrape_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Graphs are fed the page HTML rather than the URL, so each page is only
+    # downloaded once however many prompts are tested against it
+    html = _fetch_html(url)
+    pool = _graph_pool.setdefault((prompt, config["llm"]["model"]), queue.SimpleQueue())
+    try:
+        scraper = pool.get_nowait()
+        scraper.source = html
+    except queue.Empty:
+        scraper = SmartScraperGraph(prompt=prompt, source=html, config=config)
+    try:
+        result = scraper.run()
+    finally:
+        pool.put(scraper)
+    if result is None:
+        raise ValueError("Scraper returned None")
+
+    scrape_cache.set(key, result, expire=SCRAPE_CACHE_TTL)
+    return result
+
+
+async def batch_scrape(urls, prompt, config, max_concurrency=MAX_CONCURRENT_SCRAPES):
+    semaphore = AdaptiveSemaphore(max_concurrency)
+
+    async def _one(url):
+        # The scraper is blocking, so run it in a worker thread
+        async with semaphore:
+            return await asyncio.to_thread(_run_scraper, url, prompt, config)
+
+    outcomes = await asyncio.gather(
+        *(_one(url) for url in urls), return_exceptions=True
+    )
+    logging.info(
+        "Batch done - Concurrency: %d - Latency EWMA: %.2fs",
+        semaphore.limit,
+        semaphore.latency_ewma or 0.0,
+    )
+
     results = []
-    for url in urls:
+    for url, outcome in zip(urls, outcomes):
         try:
-            scraper = SmartScraperGraph(prompt=prompt, source=url, config=config)
-            result = scraper.run()
-            if result is None:
-                raise ValueError("Scraper returned None")
+            if isinstance(outcome, Exception):
+                raise outcome
+            result = outcome
             # Basic validation
             profile = result.get("profile", {})
             media = result.get("media", [])
-            has_profile = isinstance(profile, dict) and all(
-                key in profile
-                for key in [
-                    "About Us (including locations)",
-                    "Our Culture",
-                    "Our Team",
-                    "Noteworthy & Differentiated",
-                ]
+            has_profile = isinstance(profile, dict) and REQUIRED_PROFILE_KEYS.issubset(
+                profile
             )
             has_media = isinstance(media, list) and len(media) > 0
             media_valid = (
-                all("url" in m and "type" in m for m in media) if has_media else True
+                all(REQUIRED_MEDIA_KEYS.issubset(m) for m in media)
+                if has_media
+                else True
             )
             error = None
             if not has_profile:
@@ -53,22 +225,26 @@ def batch_scrape(urls, prompt, config):
             if not media_valid:
                 error = (error + " " if error else "") + "Invalid media format"
             logging.info(
-                f"URL: {url} - Profile OK: {has_profile} - Media OK: {has_media and media_valid} - Error: {error}"
+                "URL: %s - Profile OK: %s - Media OK: %s - Error: %s",
+                url,
+                has_profile,
+                has_media and media_valid,
+                error,
             )
             results.append({"url": url, "result": result, "error": error})
         except Exception as e:
-            logging.error(f"URL: {url} - Error: {str(e)}")
+            logging.error("URL: %s - Error: %s", url, e)
             results.append(
                 {"url": url, "result": {"profile": {}, "media": []}, "error": str(e)}
             )  # Graceful failure with empty result
     return results
 
 
-def test_prompts(urls, prompts, config, batch_size=20):
+async def test_prompts(urls, prompts, config, batch_size=20):
     comparisons = {}
     for prompt_name, prompt in prompts.items():
         batch_urls = urls[:batch_size]
-        results = batch_scrape(batch_urls, prompt, config)
+        results = await batch_scrape(batch_urls, prompt, config)
         success_count = sum(1 for r in results if r["error"] is None)
         avg_media = sum(
             len(r["result"].get("media", [])) for r in results if r["result"]
@@ -80,31 +256,28 @@ def test_prompts(urls, prompts, config, batch_size=20):
             "results": results,
         }
         logging.info(
-            f"Tested {prompt_name} - Success Rate: {success_count / batch_size:.2f} - Avg Media: {avg_media:.2f}"
+            "Tested %s - Success Rate: %.2f - Avg Media: %.2f",
+            prompt_name,
+            success_count / batch_size,
+            avg_media,
         )
     return comparisons
 
 
-if __name__ == "__main__":
-    with open("test_urls.json", "r") as f:
-        all_urls = json.load(f)
-
-    # Use default prompt from ai_scrapper.py
-    default_prompt = """Please extract information from the provided website to create a company profile. Organize the extracted content into the following four distinct sections, ensuring each section is clearly delineated and contains relevant details: About Us (including locations): This section should provide a concise overview of the company, its mission, and its primary activities. Crucially, identify and list all physical locations associated with the company. Our Culture: Describe the core values, working environment, and overall ethos of the company. Look for descriptions of how the company operates, its philosophy, and what it emphasizes in its internal and external interactions. Our Team: Identify key individuals, leadership, or significant roles within the company. If specific team members are highlighted, include their names and relevant contributions or backgrounds. Noteworthy & Differentiated: This section is for unique selling propositions, special features, awards, or any aspects that make the company stand out from its competitors. Look for innovative services, unique offerings, or distinctive operational models. For each section, aim for clear, descriptive language. The overall profile should be comprehensive yet concise, suitable for a mobile app experience. Pay close attention to details that highlight the company's identity and what makes it unique. Keep the response less than 500 words. Additionally, extract any media (videos and images) that are relevant to company branding (i.e. logos, and media about the company). These images will be used to populate an about-us section for the given company in a recruiting app. Respond in strict JSON format with two main keys: 'profile' (an object with the four sections as keys, each containing a string description) and 'media' (an array of objects, each with 'url' and 'type' ('image' or 'video'))."""
-
-    prompts = {
-        "Prompt1": """Output ONLY valid JSON. Do not include any additional text, explanations, or wrappers. Ensure the JSON is parseable without errors. """
-        + default_prompt,
-        "Prompt2": default_prompt
-        + """ Example output: {'profile': {'About Us (including locations)': 'Description...', 'Our Culture': 'Description...', 'Our Team': 'Description...', 'Noteworthy & Differentiated': 'Description...'}, 'media': [{'url': 'http://example.com/logo.png', 'type': 'image'}]}. Follow this structure exactly.""",
-        "Prompt3": default_prompt
-        + """ If a section or media is unavailable, use 'Not available' for strings or empty array for media. Ensure all four profile keys are always present.""",
-    }
+async def save_comparison(results, path="prompt_comparison.json"):
+    # Serialize in C, then write without blocking the event loop
+    async with aiofiles.open(path, "wb") as f:
+        await f.write(orjson.dumps(results, default=str, option=orjson.OPT_INDENT_2))
+
 
-    results = test_prompts(all_urls, prompts, graph_config)
+async def main():
+    all_urls = orjson.loads(Path("test_urls.json").read_bytes())
+    results = await test_prompts(all_urls, PROMPTS, graph_config)
+    await save_comparison(results)
 
-    with open("prompt_comparison.json", "w") as f:
-        json.dump(results, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    asyncio.run(main())
 
     print("Prompt testing complete. Comparison saved to prompt_comparison.json")
     logging.info("Prompt test completed")
@@ -0,0 +1,66 @@
+"""
+Shared pytest fixtures for the AI Web Scraper test suite.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+SERVICE_DIR = str(Path(__file__).resolve().parent.parent / "about-us-scraper-service")
+
+if SERVICE_DIR not in sys.path:
+    sys.path.append(SERVICE_DIR)
+
+
+@pytest.fixture(scope="session")
+def v4_client():
+    """Create a single test client for the API v4.0, shared by the whole session."""
+    from api.main_v4 import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="class")
+def split_client():
+    """Create a split API test client per class, running the app lifespan once."""
+    from about_us_scraper_service.api.main_split import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def mocks(monkeypatch):
+    """Replace the split API's page fetch and extraction helpers with mocks.
+
+    monkeypatch swaps the module attributes directly and restores them after
+    the test, which is much cheaper than stacking ``unittest.mock.patch``.
+    Cached and stale responses built from another test's mocks are dropped
+    first.
+    """
+    from about_us_scraper_service.api import main_split
+    from fastapi_cache import FastAPICache
+
+    asyncio.run(FastAPICache.clear())
+    main_split._stale_responses.clear()
+
+    stubs = SimpleNamespace(
+        get_page_content_async=AsyncMock(),
+        extract_company_info_programmatic=Mock(),
+        find_about_pages=Mock(),
+        extract_media_assets=Mock(),
+    )
+    for name, stub in vars(stubs).items():
+        monkeypatch.setattr(main_split, name, stub)
+    return stubs
+
+
+@pytest.fixture
+def passive_soup():
+    """Return a stand-in parsed page that is only passed through to mocked helpers."""
+    return SimpleNamespace()
@@ -1,8 +1,31 @@
 import json
 import random
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
 from ddgs import DDGS
 
+# Result links worth scraping: http(s) URLs that aren't examples or listings
+_ACCEPTED_URL_RE = re.compile(r"^https?://(?!.*(?:example|list))")
+_INDEX_PAGE_RE = re.compile(r"/index\.html?$", re.I)
+
+
+def _canonical_url(url):
+    # Same site regardless of scheme, "www.", trailing slash or index page
+    parts = urlsplit(url)
+    host = parts.netloc.lower().removeprefix("www.")
+    path = _INDEX_PAGE_RE.sub("", parts.path).rstrip("/")
+    return f"{host}{path}"
+
+
+def _query(industry):
+    # Each worker gets its own DDGS session
+    with DDGS() as ddgs:
+        return ddgs.text(
+            f"{industry} small business website California", max_results=50
+        )
+
 
 def generate_urls(max_total=200):
     industries = [
@@ -27,23 +50,23 @@ def generate_urls(max_total=200):
         "catering",
         "event planning",
     ]
-    all_urls = set()
-    for industry in industries:
-        query = f"{industry} small business website California"
-        with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=50)
-            urls = [
-                r["href"]
-                for r in results
-                if "href" in r
-                and r["href"].startswith("http")
-                and "example" not in r["href"]
-                and "list" not in r["href"]
-            ]
-            all_urls.update(urls)
-        if len(all_urls) >= max_total:
-            break
-    unique_urls = list(all_urls)[:max_total]
+    # Canonical form -> first URL seen for it
+    all_urls = {}
+    # One search per industry, run concurrently; stop once we have enough
+    executor = ThreadPoolExecutor(max_workers=8)
+    try:
+        futures = [executor.submit(_query, industry) for industry in industries]
+        for future in as_completed(futures):
+            results = future.result()
+            for r in results:
+                url = r.get("href", "")
+                if _ACCEPTED_URL_RE.match(url):
+                    all_urls.setdefault(_canonical_url(url), url)
+            if len(all_urls) >= max_total:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    unique_urls = list(all_urls.values())[:max_total]
     random.shuffle(unique_urls)  # Randomize for varied testing
     return unique_urls
 
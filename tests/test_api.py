@@ -6,15 +6,22 @@ import base64
 import json
 import os
 
-import requests
+import httpx
 
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
 OPENAI_API_KEY = "your-openai-api-key-here"  # Replace with your actual API key
 
+# Base64 characters decoded per write when saving media
+BASE64_CHUNK_SIZE = 1 << 16
 
-def test_api():
+
+def test_api(client=None):
     """Test the scraping API with a sample URL"""
+    if client is None:
+        # Called on its own (e.g. collected by pytest): use a one-off client
+        with httpx.Client(base_url=API_BASE_URL) as client:
+            return test_api(client)
 
     # Test data
     test_url = "https://flightclothingboutique.com/pages/about-us"
@@ -30,7 +37,7 @@ def test_api():
 
     try:
         # Make API request
-        response = requests.post(f"{API_BASE_URL}/scrape", json=payload, timeout=120)
+        response = client.post("/scrape", json=payload, timeout=120)
 
         if response.status_code == 200:
             result = response.json()
@@ -60,11 +67,11 @@ def test_api():
             print(f"❌ API Error: {response.status_code}")
             print(response.text)
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print(
             "⏰ Request timed out. The scraping process might take longer for complex sites."
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"🔥 Request failed: {e}")
     except Exception as e:
         print(f"💥 Unexpected error: {e}")
@@ -76,13 +83,14 @@ def save_media_file(media_item, index):
         # Create media directory if it doesn't exist
         os.makedirs("api_media_output", exist_ok=True)
 
-        # Decode base64 data
-        media_data = base64.b64decode(media_item["base64_data"])
-
-        # Save file
+        # Decode and write in slices so large media is never held twice;
+        # slice length is a multiple of 4 so each slice decodes on its own
+        base64_data = media_item["base64_data"]
         file_path = f"api_media_output/{index}_{media_item['filename']}"
         with open(file_path, "wb") as f:
-            f.write(media_data)
+            for start in range(0, len(base64_data), BASE64_CHUNK_SIZE):
+                chunk = base64_data[start : start + BASE64_CHUNK_SIZE]
+                f.write(base64.b64decode(chunk))
 
         print(f"💾 Saved: {file_path}")
 
@@ -90,10 +98,14 @@ def save_media_file(media_item, index):
         print(f"⚠️ Failed to save media file: {e}")
 
 
-def test_health():
+def test_health(client=None):
     """Test the health endpoint"""
+    if client is None:
+        # Called on its own (e.g. collected by pytest): use a one-off client
+        with httpx.Client(base_url=API_BASE_URL) as client:
+            return test_health(client)
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = client.get("/health")
         if response.status_code == 200:
             print("✅ API Health Check Passed")
             print(json.dumps(response.json(), indent=2))
@@ -122,12 +134,14 @@ if __name__ == "__main__":
             print("❌ No API key found. Exiting...")
             exit(1)
 
-    # Test health first
-    print("\n1. Testing API Health...")
-    test_health()
+    # One client for both calls so the keep-alive connection is reused
+    with httpx.Client(base_url=API_BASE_URL) as client:
+        # Test health first
+        print("\n1. Testing API Health...")
+        test_health(client)
 
-    # Test scraping
-    print("\n2. Testing Web Scraping...")
-    test_api()
+        # Test scraping
+        print("\n2. Testing Web Scraping...")
+        test_api(client)
 
     print("\n✨ Test completed!")
@@ -4,14 +4,18 @@ Simple test script for the AI Web Scraper API
 """
 import json
 
-import requests
+import httpx
 
 # API endpoint
 API_URL = "http://localhost:8000"
 
 
-def test_api():
+def test_api(client=None):
     """Test the API with a sample company URL"""
+    if client is None:
+        # Called on its own (e.g. collected by pytest): use a one-off client
+        with httpx.Client(base_url=API_URL) as client:
+            return test_api(client)
 
     # Test data - you can change this URL to any company website
     test_data = {
@@ -29,8 +33,8 @@ def test_api():
 
     try:
         # Send POST request to /scrape endpoint
-        response = requests.post(
-            f"{API_URL}/scrape",
+        response = client.post(
+            "/scrape",
             json=test_data,
             timeout=120,  # 2 minute timeout for scraping
         )
@@ -74,20 +78,24 @@ def test_api():
             except:
                 print(f"Error response: {response.text}")
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("⏰ Request timed out (this can happen with large websites)")
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("🔌 Connection error - make sure the API server is running")
     except Exception as e:
         print(f"❌ Unexpected error: {str(e)}")
 
 
-def test_health():
+def test_health(client=None):
     """Test the health endpoint"""
+    if client is None:
+        # Called on its own (e.g. collected by pytest): use a one-off client
+        with httpx.Client(base_url=API_URL) as client:
+            return test_health(client)
     print("\n🏥 Testing Health Endpoint")
     print("-" * 30)
     try:
-        response = requests.get(f"{API_URL}/")
+        response = client.get("/")
         if response.status_code == 200:
             print("✅ API is healthy!")
             print(f"Response: {response.json()}")
@@ -98,11 +106,13 @@ def test_health():
 
 
 if __name__ == "__main__":
-    # Test health first
-    test_health()
+    # One client for both calls so the keep-alive connection is reused
+    with httpx.Client(base_url=API_URL) as client:
+        # Test health first
+        test_health(client)
 
-    # Then test scraping
-    test_api()
+        # Then test scraping
+        test_api(client)
 
     print("\n" + "=" * 50)
     print("💡 To test with a different URL, edit the 'url' in test_data above")
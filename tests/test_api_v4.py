@@ -7,118 +7,129 @@ import base64
 import json
 from unittest.mock import Mock, patch
 
+import fastjsonschema
 import pytest
-from fastapi.testclient import TestClient
 
+from ._helpers import json_body
+
+# Successful /scrape/text response shape required by the remote team,
+# compiled once and shared by both test classes
+SCRAPE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "required": ["statusCode", "message", "scrapingData"],
+    "properties": {
+        "scrapingData": {
+            "type": "object",
+            "required": [
+                "page_title",
+                "url",
+                "language",
+                "summary",
+                "sections",
+                "key_values",
+                "media",
+                "notes",
+            ],
+            "properties": {
+                "sections": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["name", "content_summary", "raw_excerpt"],
+                    },
+                },
+                "key_values": {
+                    "type": "array",
+                    "items": {"type": "object", "required": ["key", "value"]},
+                },
+                "media": {
+                    "type": "object",
+                    "required": ["images", "videos"],
+                    "properties": {
+                        "images": {"type": "array"},
+                        "videos": {"type": "array"},
+                    },
+                },
+            },
+        },
+    },
+}
+validate_scrape_response = fastjsonschema.compile(SCRAPE_RESPONSE_SCHEMA)
+
+# Default parsed page shared by the scrape tests; tests override single
+# attributes through monkeypatch, which restores them afterwards
+_FROZEN_SOUP = Mock()
+_FROZEN_SOUP.find.return_value = Mock(get_text=lambda: "Test Company")
+_FROZEN_SOUP.get_text.return_value = "Test content about the company"
+_FROZEN_SOUP.find_all.return_value = []
+
+
+@pytest.fixture
+def client(v4_client):
+    """Reuse the session-wide API v4.0 test client."""
+    return v4_client
 
-class TestAPIV4:
-    """Test suite for the API v4.0 with remote team compatible schema."""
 
-    @pytest.fixture
-    def client(self):
-        """Create a test client for the API v4.0."""
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'about-us-scraper-service'))
-        from api.main_v4 import app
+@pytest.fixture
+def soup():
+    """Return the shared soup mock with its recorded calls cleared."""
+    _FROZEN_SOUP.reset_mock()
+    return _FROZEN_SOUP
 
-        return TestClient(app)
+
+@pytest.mark.xdist_group("v4")
+class TestAPIV4:
+    """Test suite for the API v4.0 with remote team compatible schema."""
 
     def test_health_endpoint(self, client):
         """Test the health endpoint returns correct v4 info."""
         response = client.get("/health")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
         assert data["status"] == "healthy"
         assert data["version"] == "4.0.0"
         assert data["approach"] == "remote_team_compatible"
 
     @patch("api.main_v4.get_page_content")
     def test_scrape_text_endpoint_schema_compliance(
-        self, mock_get_content, client
+        self, mock_get_content, client, soup
     ):
         """Test that the /scrape/text endpoint returns the correct schema."""
         # Mock the dependencies
-        mock_soup = Mock()
-        mock_soup.find.return_value = Mock(get_text=lambda: "Test Company")
-        mock_soup.get_text.return_value = "Test content about the company"
-        mock_soup.find_all.return_value = []
-        mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
+        mock_get_content.return_value = (soup, "<html>test</html>", 200)
 
         # Test the endpoint
         response = client.get("/scrape/text?url=test.com")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
-        # Verify top-level schema compliance
-        assert "statusCode" in data
-        assert "message" in data
-        assert "scrapingData" in data
+        # Verify schema compliance
+        validate_scrape_response(data)
 
         assert data["statusCode"] == 200
         assert data["message"] == "URL scraping completed successfully"
 
-        # Verify scrapingData structure
-        scraping_data = data["scrapingData"]
-        required_fields = [
-            "page_title",
-            "url",
-            "language",
-            "summary",
-            "sections",
-            "key_values",
-            "media",
-            "notes",
-        ]
-        for field in required_fields:
-            assert field in scraping_data, f"Missing required field: {field}"
-
-        # Verify sections format
-        assert isinstance(scraping_data["sections"], list)
-        if scraping_data["sections"]:
-            section = scraping_data["sections"][0]
-            assert "name" in section
-            assert "content_summary" in section
-            assert "raw_excerpt" in section
-
-        # Verify key_values format
-        assert isinstance(scraping_data["key_values"], list)
-        if scraping_data["key_values"]:
-            kv = scraping_data["key_values"][0]
-            assert "key" in kv
-            assert "value" in kv
-
-        # Verify media format
-        assert isinstance(scraping_data["media"], dict)
-        assert "images" in scraping_data["media"]
-        assert "videos" in scraping_data["media"]
-        assert isinstance(scraping_data["media"]["images"], list)
-        assert isinstance(scraping_data["media"]["videos"], list)
-
     @patch("api.main_v4.get_page_content")
     def test_scrape_text_endpoint_with_real_data_structure(
-        self, mock_get_content, client
+        self, mock_get_content, client, soup, monkeypatch
     ):
         """Test the endpoint with realistic data structure."""
         # Mock a more realistic response
-        mock_soup = Mock()
-        mock_soup.find.return_value = Mock(get_text=lambda: "About Test Company")
-        mock_soup.get_text.return_value = "Founded in 2020, Test Company is based in San Francisco. We specialize in technology solutions."
-        mock_soup.find_all.return_value = []
+        monkeypatch.setattr(soup, "get_text", Mock(return_value="Founded in 2020, Test Company is based in San Francisco. We specialize in technology solutions."))
 
         # Mock language detection
         mock_html_tag = Mock()
         mock_html_tag.get.return_value = "en"
-        mock_soup.find.side_effect = lambda tag, **kwargs: mock_html_tag if tag == "html" else None
+        monkeypatch.setattr(soup, "find", Mock(side_effect=lambda tag, **kwargs: mock_html_tag if tag == "html" else None))
 
-        mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
+        mock_get_content.return_value = (soup, "<html>test</html>", 200)
 
         response = client.get("/scrape/text?url=test.com")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
         # Verify the response matches the expected schema exactly
         expected_structure = {
@@ -160,7 +171,7 @@ class TestAPIV4:
             response = client.get("/scrape/text?url=invalid-url")
 
             assert response.status_code == 200  # FastAPI returns 200 with error in body
-            data = response.json()
+            data = json_body(response)
 
             # Verify error schema compliance
             assert data["statusCode"] == 500
@@ -168,23 +179,20 @@ class TestAPIV4:
             assert "scrapingData" in data
             assert data["scrapingData"] is None
 
-    def test_scrape_text_endpoint_with_parameters(self, client):
+    def test_scrape_text_endpoint_with_parameters(self, client, soup, monkeypatch):
         """Test the endpoint with custom parameters."""
         with patch(
             "api.main_v4.get_page_content"
         ) as mock_get_content:
-            mock_soup = Mock()
-            mock_soup.find.return_value = Mock(get_text=lambda: "Test Company")
-            mock_soup.get_text.return_value = "Test content"
-            mock_soup.find_all.return_value = []
-            mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
+            monkeypatch.setattr(soup, "get_text", Mock(return_value="Test content"))
+            mock_get_content.return_value = (soup, "<html>test</html>", 200)
 
             response = client.get(
                 "/scrape/text?url=test.com&max_sections=5&max_key_values=3"
             )
 
             assert response.status_code == 200
-            data = response.json()
+            data = json_body(response)
 
             # Verify parameters are respected
             scraping_data = data["scrapingData"]
@@ -193,9 +201,6 @@ class TestAPIV4:
 
     def test_lambda_handler_v4_integration(self):
         """Test the lambda handler with a valid API Gateway event."""
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'about-us-scraper-service'))
         from api.lambda_handler_v4 import lambda_handler
 
         # Create a valid API Gateway event
@@ -242,7 +247,7 @@ class TestAPIV4:
         response = client.get("/")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
         assert data["message"] == "AI Web Scraper API - Version 4.0"
         assert data["version"] == "4.0.0"
@@ -251,75 +256,29 @@ class TestAPIV4:
         assert "/health" in data["health"]
 
 
+@pytest.mark.xdist_group("v4")
 class TestSchemaCompliance:
     """Test schema compliance with remote team requirements."""
 
-    @pytest.fixture
-    def client(self):
-        """Create a test client."""
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'about-us-scraper-service'))
-        from api.main_v4 import app
-
-        return TestClient(app)
-
-    def test_schema_matches_remote_team_example(self, client):
+    def test_schema_matches_remote_team_example(self, client, soup, monkeypatch):
         """Test that our schema exactly matches the remote team example."""
         with patch(
             "api.main_v4.get_page_content"
         ) as mock_get_content:
             # Mock realistic data that matches the Ambiance SF example
-            mock_soup = Mock()
-            mock_soup.find.return_value = Mock(get_text=lambda: "About Ambiance San Francisco | Women's Boutique Locations – Ambiance SF")
-            mock_soup.get_text.return_value = "Founded in 1996, our store is located in San Francisco's hottest shopping neighborhoods. Ambiance San Francisco is a women's boutique with multiple locations in San Francisco."
-            mock_soup.find_all.return_value = []
+            monkeypatch.setattr(soup, "get_text", Mock(return_value="Founded in 1996, our store is located in San Francisco's hottest shopping neighborhoods. Ambiance San Francisco is a women's boutique with multiple locations in San Francisco."))
 
             # Mock language detection
             mock_html_tag = Mock()
             mock_html_tag.get.return_value = "en"
-            mock_soup.find.side_effect = lambda tag, **kwargs: mock_html_tag if tag == "html" else None
+            monkeypatch.setattr(soup, "find", Mock(side_effect=lambda tag, **kwargs: mock_html_tag if tag == "html" else None))
 
-            mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
+            mock_get_content.return_value = (soup, "<html>test</html>", 200)
 
             response = client.get("/scrape/text?url=ambiancesf.com/pages/about")
 
             assert response.status_code == 200
-            data = response.json()
+            data = json_body(response)
 
             # Verify exact schema compliance
-            required_top_level = ["statusCode", "message", "scrapingData"]
-            for field in required_top_level:
-                assert field in data, f"Missing top-level field: {field}"
-
-            scraping_data = data["scrapingData"]
-            required_data_fields = [
-                "page_title", "url", "language", "summary", 
-                "sections", "key_values", "media", "notes"
-            ]
-            for field in required_data_fields:
-                assert field in scraping_data, f"Missing scrapingData field: {field}"
-
-            # Verify sections array structure
-            assert isinstance(scraping_data["sections"], list)
-            if scraping_data["sections"]:
-                section = scraping_data["sections"][0]
-                required_section_fields = ["name", "content_summary", "raw_excerpt"]
-                for field in required_section_fields:
-                    assert field in section, f"Missing section field: {field}"
-
-            # Verify key_values array structure
-            assert isinstance(scraping_data["key_values"], list)
-            if scraping_data["key_values"]:
-                kv = scraping_data["key_values"][0]
-                required_kv_fields = ["key", "value"]
-                for field in required_kv_fields:
-                    assert field in kv, f"Missing key_value field: {field}"
-
-            # Verify media object structure
-            media = scraping_data["media"]
-            assert isinstance(media, dict)
-            assert "images" in media
-            assert "videos" in media
-            assert isinstance(media["images"], list)
-            assert isinstance(media["videos"], list)
+            validate_scrape_response(data)
@@ -2,64 +2,81 @@
 Basic import tests to ensure the API can be imported without errors.
 """
 
+import importlib
+import importlib.util
+
+import httpx
 import pytest
 
+API_MODULES = [
+    "api.main",
+    "api.models",
+    "api.endpoints.media",
+    "api.endpoints.profile",
+    "api.middleware.compression",
+    "api.middleware.rate_limit",
+    "api.middleware.tracing",
+    "api.middleware.validation",
+    "api.services.llm",
+    "api.services.media",
+    "api.utils.cache",
+    "api.utils.logging",
+    "api.utils.pagination",
+    "api.utils.retry",
+    "api.utils.storage",
+    "api.utils.versioning",
+]
+
+
+@pytest.fixture(scope="module")
+def app():
+    """Import the main FastAPI app once for the module."""
+    from api.main import app
 
-def test_api_imports():
-    """Test that the main API modules can be imported."""
-    try:
-        from api import main, models
-        from api.endpoints import media, profile
-        from api.middleware import compression, rate_limit, tracing, validation
-        from api.services import llm
-        from api.services import media as media_service
-        from api.utils import cache, logging, pagination, retry, storage, versioning
-    except ImportError as e:
-        pytest.fail(f"Failed to import API modules: {e}")
+    return app
 
 
-def test_fastapi_app_creation():
-    """Test that the FastAPI app can be created."""
-    try:
-        from api.main import app
+@pytest.fixture(scope="module")
+def route_paths(app):
+    """Collect the main app's route paths once for the module."""
+    return frozenset(route.path for route in app.routes)
+
+
+@pytest.mark.parametrize("modpath", API_MODULES)
+def test_module_importable(modpath):
+    """Test that each main API module exists and imports cleanly."""
+    assert importlib.util.find_spec(modpath) is not None, modpath
+    importlib.import_module(modpath)
+
 
-        assert app is not None
-        assert app.title == "AI Web Scraper API"
-    except Exception as e:
-        pytest.fail(f"Failed to create FastAPI app: {e}")
+def test_fastapi_app_creation(app):
+    """Test that the FastAPI app can be created."""
+    assert app is not None
+    assert app.title == "AI Web Scraper API"
 
 
 def test_split_api_imports():
     """Test that the split API modules can be imported."""
-    try:
-        from about_us_scraper_service.api.lambda_handler_split import lambda_handler
-        from about_us_scraper_service.api.main_split import app
+    from about_us_scraper_service.api.lambda_handler_split import lambda_handler
+    from about_us_scraper_service.api.main_split import app
 
-        assert app is not None
-        assert app.title == "AI Web Scraper API - Split Approach"
-        assert callable(lambda_handler)
-    except ImportError as e:
-        pytest.fail(f"Failed to import split API modules: {e}")
+    assert app is not None
+    assert app.title == "AI Web Scraper API - Split Approach"
+    assert callable(lambda_handler)
 
 
-def test_health_endpoint_exists():
+def test_health_endpoint_exists(route_paths):
     """Test that the health endpoint is registered."""
-    from api.main import app
-
-    # Check if health endpoint exists in the app routes
-    routes = [route.path for route in app.routes]
-    assert "/health" in routes
+    assert "/health" in route_paths
 
 
 @pytest.mark.asyncio
-async def test_health_endpoint_response():
+async def test_health_endpoint_response(app):
     """Test that the health endpoint returns a valid response."""
-    from fastapi.testclient import TestClient
-
-    from api.main import app
-
-    client = TestClient(app)
-    response = client.get("/health")
+    # Call the ASGI app in-process; no TestClient portal thread or lifespan
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/health")
 
     assert response.status_code == 200
     data = response.json()
@@ -3,72 +3,184 @@ Tests for the split API endpoints (text, media, enhance).
 """
 
 import base64
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+
+from ._helpers import json_body
+
+# Keep the whole module on one xdist worker alongside its split_client
+pytestmark = pytest.mark.xdist_group("split")
+
+# Media pagination cursors
+_CURSOR_1 = "m_1"
+_CURSOR_2 = "m_2"
+
+# Canned helper results shared by the tests. Mocks hand back these same
+# objects, and nothing mutates them, so they are built once at import.
+_MOCK_COMPANY_DATA = {
+    "title": "Test Company",
+    "description": "A test company",
+    "content": "Test content",
+    "company_info": {
+        "founded": "2020",
+        "employees": "10",
+        "location": "Test City",
+        "mission": "Test mission",
+        "confidence": "high",
+    },
+    "url": "https://test.com",
+}
+
+_MOCK_LEGACY_COMPANY_DATA = {
+    "title": "Test",
+    "description": "Test",
+    "content": "Test",
+    "company_info": {"confidence": "medium"},
+    "url": "https://test.com",
+}
+
+_MOCK_ABOUT_PAGES = [
+    {
+        "url": "https://test.com/about",
+        "title": "About Us",
+        "relevance_score": 0.9,
+    }
+]
+
+_MOCK_MEDIA_DATA = {
+    "media_assets": [
+        {
+            "id": "test123",
+            "url": "https://test.com/logo.png",
+            "type": "image",
+            "alt": "Company Logo",
+            "priority": 100,
+            "context": "Company Logo",
+        }
+    ],
+    "media_summary": {
+        "total_assets": 5,
+        "images_count": 5,
+        "videos_count": 0,
+        "documents_count": 0,
+        "icons_count": 0,
+        "current_page_count": 1,
+        "has_more": True,
+    },
+    "pagination": {
+        "next_cursor": _CURSOR_1,
+        "has_more": True,
+        "total_count": 5,
+        "current_page_start": 0,
+        "current_page_end": 1,
+    },
+}
+
+_MOCK_MEDIA_DATA_PAGE_2 = {
+    "media_assets": [
+        {
+            "id": "test456",
+            "url": "https://test.com/image2.png",
+            "type": "image",
+            "alt": "Second Image",
+            "priority": 80,
+            "context": "Second Image",
+        }
+    ],
+    "media_summary": {
+        "total_assets": 5,
+        "images_count": 5,
+        "videos_count": 0,
+        "documents_count": 0,
+        "icons_count": 0,
+        "current_page_count": 1,
+        "has_more": True,
+    },
+    "pagination": {
+        "next_cursor": _CURSOR_2,
+        "has_more": True,
+        "total_count": 5,
+        "current_page_start": 1,
+        "current_page_end": 2,
+    },
+}
+
+_MOCK_EMPTY_MEDIA_DATA = {
+    "media_assets": [],
+    "media_summary": {
+        "total_assets": 0,
+        "images_count": 0,
+        "videos_count": 0,
+        "documents_count": 0,
+        "icons_count": 0,
+        "current_page_count": 0,
+        "has_more": False,
+    },
+    "pagination": {
+        "next_cursor": None,
+        "has_more": False,
+        "total_count": 0,
+        "current_page_start": 0,
+        "current_page_end": 0,
+    },
+}
+
+
+def _mock_tag(name, attrs):
+    """Build a tag mock whose ``.get()`` gives "" for attributes it doesn't have."""
+    tag = Mock()
+    tag.name = name
+    tag.get = lambda key, default="": attrs.get(key, default)
+    return tag
+
+
+def _find_all_from(tags):
+    """Build a ``soup.find_all`` stand-in that looks tag names up in ``tags``."""
+
+    def find_all(name, **attrs):
+        # find_all() also takes a list of names, which can't be a dict key
+        return tags.get(name if isinstance(name, str) else tuple(name), [])
+
+    return find_all
+
+
+@pytest.fixture
+def client(split_client):
+    """Reuse the class-wide split API test client."""
+    return split_client
 
 
 class TestSplitAPI:
     """Test suite for the split API endpoints."""
 
-    @pytest.fixture
-    def client(self):
-        """Create a test client for the split API."""
-        from about_us_scraper_service.api.main_split import app
-
-        return TestClient(app)
-
     def test_health_endpoint(self, client):
         """Test the health endpoint returns correct split API info."""
         response = client.get("/health")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
         assert data["status"] == "healthy"
         assert data["version"] == "3.0.0"
         assert data["approach"] == "split"
 
-    @patch("about_us_scraper_service.api.main_split.get_page_content")
-    @patch("about_us_scraper_service.api.main_split.extract_company_info_programmatic")
-    @patch("about_us_scraper_service.api.main_split.find_about_pages")
-    def test_scrape_text_endpoint(
-        self, mock_find_about, mock_extract_company, mock_get_content, client
-    ):
+    def test_scrape_text_endpoint(self, client, mocks, passive_soup):
         """Test the /scrape/text endpoint."""
         # Mock the dependencies
-        mock_soup = Mock()
-        mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
-
-        mock_company_data = {
-            "title": "Test Company",
-            "description": "A test company",
-            "content": "Test content",
-            "company_info": {
-                "founded": "2020",
-                "employees": "10",
-                "location": "Test City",
-                "mission": "Test mission",
-                "confidence": "high",
-            },
-            "url": "https://test.com",
-        }
-        mock_extract_company.return_value = mock_company_data
-
-        mock_about_pages = [
-            {
-                "url": "https://test.com/about",
-                "title": "About Us",
-                "relevance_score": 0.9,
-            }
-        ]
-        mock_find_about.return_value = mock_about_pages
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = _MOCK_COMPANY_DATA
+        mocks.find_about_pages.return_value = _MOCK_ABOUT_PAGES
 
         # Test the endpoint
         response = client.get("/scrape/text?url=test.com")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
         # Verify response structure
         assert data["success"] is True
@@ -80,51 +192,62 @@ class TestSplitAPI:
         assert data["approach_used"] == "programmatic_only"
         assert "processing_time_seconds" in data
 
-    @patch("about_us_scraper_service.api.main_split.get_page_content")
-    @patch("about_us_scraper_service.api.main_split.extract_media_assets")
-    def test_scrape_media_endpoint_no_cursor(
-        self, mock_extract_media, mock_get_content, client
+    def test_scrape_text_endpoint_cached(self, client, mocks, passive_soup):
+        """Test that a repeat /scrape/text call is served from the cache."""
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = _MOCK_COMPANY_DATA
+        mocks.find_about_pages.return_value = _MOCK_ABOUT_PAGES
+
+        first = client.get("/scrape/text?url=test.com")
+        second = client.get("/scrape/text?url=https://test.com")
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.headers["X-FastAPI-Cache"] == "HIT"
+        assert json_body(second) == json_body(first)
+        mocks.get_page_content_async.assert_called_once()
+
+    def test_scrape_text_cache_is_bounded(
+        self, client, mocks, passive_soup, monkeypatch
     ):
+        """Test that the per-URL response cache evicts its oldest entries."""
+        from fastapi_cache import FastAPICache
+
+        monkeypatch.setattr(FastAPICache.get_backend(), "max_entries", 1)
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = _MOCK_COMPANY_DATA
+        mocks.find_about_pages.return_value = []
+
+        client.get("/scrape/text?url=one.com")
+        client.get("/scrape/text?url=two.com")
+        response = client.get("/scrape/text?url=one.com")
+
+        assert response.headers["X-FastAPI-Cache"] == "MISS"
+        assert mocks.get_page_content_async.call_count == 3
+
+    def test_scrape_media_endpoint_no_cursor(self, client, mocks, passive_soup):
         """Test the /scrape/media endpoint without cursor."""
         # Mock the dependencies
-        mock_soup = Mock()
-        mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
-
-        mock_media_data = {
-            "media_assets": [
-                {
-                    "id": "test123",
-                    "url": "https://test.com/logo.png",
-                    "type": "image",
-                    "alt": "Company Logo",
-                    "priority": 100,
-                    "context": "Company Logo",
-                }
-            ],
-            "media_summary": {
-                "total_assets": 5,
-                "images_count": 5,
-                "videos_count": 0,
-                "documents_count": 0,
-                "icons_count": 0,
-                "current_page_count": 1,
-                "has_more": True,
-            },
-            "pagination": {
-                "next_cursor": base64.b64encode("media:1".encode()).decode(),
-                "has_more": True,
-                "total_count": 5,
-                "current_page_start": 0,
-                "current_page_end": 1,
-            },
-        }
-        mock_extract_media.return_value = mock_media_data
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_media_assets.return_value = _MOCK_MEDIA_DATA
 
         # Test the endpoint
         response = client.get("/scrape/media?url=test.com&limit=1")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
         # Verify response structure
         assert data["success"] is True
@@ -136,52 +259,21 @@ class TestSplitAPI:
         assert "next_cursor" in data["pagination"]
         assert data["approach_used"] == "programmatic_only"
 
-    @patch("about_us_scraper_service.api.main_split.get_page_content")
-    @patch("about_us_scraper_service.api.main_split.extract_media_assets")
-    def test_scrape_media_endpoint_with_cursor(
-        self, mock_extract_media, mock_get_content, client
-    ):
+    def test_scrape_media_endpoint_with_cursor(self, client, mocks, passive_soup):
         """Test the /scrape/media endpoint with cursor pagination."""
         # Mock the dependencies
-        mock_soup = Mock()
-        mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
-
-        mock_media_data = {
-            "media_assets": [
-                {
-                    "id": "test456",
-                    "url": "https://test.com/image2.png",
-                    "type": "image",
-                    "alt": "Second Image",
-                    "priority": 80,
-                    "context": "Second Image",
-                }
-            ],
-            "media_summary": {
-                "total_assets": 5,
-                "images_count": 5,
-                "videos_count": 0,
-                "documents_count": 0,
-                "icons_count": 0,
-                "current_page_count": 1,
-                "has_more": True,
-            },
-            "pagination": {
-                "next_cursor": base64.b64encode("media:2".encode()).decode(),
-                "has_more": True,
-                "total_count": 5,
-                "current_page_start": 1,
-                "current_page_end": 2,
-            },
-        }
-        mock_extract_media.return_value = mock_media_data
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_media_assets.return_value = _MOCK_MEDIA_DATA_PAGE_2
 
         # Test with cursor
-        cursor = base64.b64encode("media:1".encode()).decode()
-        response = client.get(f"/scrape/media?url=test.com&cursor={cursor}&limit=1")
+        response = client.get(f"/scrape/media?url=test.com&cursor={_CURSOR_1}&limit=1")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
         # Verify cursor pagination worked
         assert data["success"] is True
@@ -189,36 +281,28 @@ class TestSplitAPI:
         assert data["pagination"]["current_page_start"] == 1
         assert data["pagination"]["current_page_end"] == 2
 
-    @patch("about_us_scraper_service.api.main_split.get_page_content")
-    @patch("about_us_scraper_service.api.main_split.extract_company_info_programmatic")
-    def test_scrape_enhance_endpoint(
-        self, mock_extract_company, mock_get_content, client
-    ):
+    def test_scrape_enhance_endpoint(self, client, mocks, passive_soup):
         """Test the /scrape/enhance endpoint."""
         # Mock the dependencies
-        mock_soup = Mock()
-        mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
-
-        mock_company_data = {
-            "title": "Test Company",
-            "description": "A test company",
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = {
+            **_MOCK_COMPANY_DATA,
             "content": "Test content for AI enhancement",
             "company_info": {
-                "founded": "2020",
-                "employees": "10",
-                "location": "Test City",
-                "mission": "Test mission",
+                **_MOCK_COMPANY_DATA["company_info"],
                 "confidence": "medium",
             },
-            "url": "https://test.com",
         }
-        mock_extract_company.return_value = mock_company_data
 
         # Test the endpoint
         response = client.get("/scrape/enhance?url=test.com")
 
         assert response.status_code == 200
-        data = response.json()
+        data = json_body(response)
 
         # Verify response structure
         assert data["success"] is True
@@ -228,90 +312,105 @@ class TestSplitAPI:
         assert data["approach_used"] == "ai_enhanced"
         assert "processing_time_seconds" in data
 
-    def test_scrape_text_endpoint_invalid_url(self, client):
+    def test_scrape_text_endpoint_invalid_url(self, client, mocks):
         """Test the /scrape/text endpoint with invalid URL."""
-        with patch(
-            "about_us_scraper_service.api.main_split.get_page_content"
-        ) as mock_get_content:
-            mock_get_content.side_effect = Exception("Invalid URL")
+        mocks.get_page_content_async.side_effect = httpx.ConnectError("Invalid URL")
+
+        response = client.get("/scrape/text?url=invalid-url")
 
-            response = client.get("/scrape/text?url=invalid-url")
+        assert response.status_code == 400
+        data = json_body(response)
+        assert "detail" in data
 
-            assert response.status_code == 500
-            data = response.json()
-            assert "detail" in data
+    def test_scrape_text_endpoint_malformed_url(self, client):
+        """Test that a URL httpx can't parse is reported as a 400."""
+        response = client.get("/scrape/text", params={"url": "http://[::1"})
 
-    def test_scrape_media_endpoint_invalid_cursor(self, client):
+        assert response.status_code == 400
+        assert json_body(response)["detail"].startswith("Failed to fetch URL")
+
+    def test_scrape_text_endpoint_stale_fallback(self, client, mocks, passive_soup):
+        """Test that a failed scrape can fall back to the last good response."""
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = _MOCK_COMPANY_DATA
+        mocks.find_about_pages.return_value = _MOCK_ABOUT_PAGES
+        fresh = client.get("/scrape/text?url=test.com")
+
+        mocks.get_page_content_async.side_effect = httpx.ConnectError("Invalid URL")
+        # Bypass the fresh response cache so the scrape really runs and fails
+        response = client.get(
+            "/scrape/text?url=test.com",
+            headers={"X-Cache-Fallback": "allow", "Cache-Control": "no-cache"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Warning"] == '110 - "Response is stale"'
+        assert json_body(response) == json_body(fresh)
+
+        # Without opting in, the error is still surfaced
+        response = client.get(
+            "/scrape/text?url=test.com", headers={"Cache-Control": "no-cache"}
+        )
+        assert response.status_code == 400
+
+    def test_stale_responses_are_bounded(
+        self, client, mocks, passive_soup, monkeypatch
+    ):
+        """Test that only the newest good responses are kept for fallback."""
+        from about_us_scraper_service.api import main_split
+
+        monkeypatch.setattr(main_split, "STALE_CACHE_MAX_ENTRIES", 1)
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = _MOCK_COMPANY_DATA
+        mocks.find_about_pages.return_value = []
+        client.get("/scrape/text?url=one.com")
+        client.get("/scrape/text?url=two.com")
+
+        mocks.get_page_content_async.side_effect = httpx.ConnectError("Invalid URL")
+        headers = {"X-Cache-Fallback": "allow", "Cache-Control": "no-cache"}
+        assert client.get("/scrape/text?url=two.com", headers=headers).is_success
+        response = client.get("/scrape/text?url=one.com", headers=headers)
+        assert response.status_code == 400
+
+    def test_scrape_media_endpoint_invalid_cursor(self, client, mocks, passive_soup):
         """Test the /scrape/media endpoint with invalid cursor."""
-        with patch(
-            "about_us_scraper_service.api.main_split.get_page_content"
-        ) as mock_get_content:
-            mock_soup = Mock()
-            mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
-
-            with patch(
-                "about_us_scraper_service.api.main_split.extract_media_assets"
-            ) as mock_extract:
-                mock_extract.return_value = {
-                    "media_assets": [],
-                    "media_summary": {
-                        "total_assets": 0,
-                        "images_count": 0,
-                        "videos_count": 0,
-                        "documents_count": 0,
-                        "icons_count": 0,
-                        "current_page_count": 0,
-                        "has_more": False,
-                    },
-                    "pagination": {
-                        "next_cursor": None,
-                        "has_more": False,
-                        "total_count": 0,
-                        "current_page_start": 0,
-                        "current_page_end": 0,
-                    },
-                }
-
-                # Test with invalid cursor (should default to start_index = 0)
-                response = client.get(
-                    "/scrape/media?url=test.com&cursor=invalid-cursor&limit=10"
-                )
-
-                assert response.status_code == 200
-                data = response.json()
-                assert data["success"] is True
-
-    def test_legacy_endpoints_redirect(self, client):
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_media_assets.return_value = _MOCK_EMPTY_MEDIA_DATA
+
+        # Test with invalid cursor (should default to start_index = 0)
+        response = client.get(
+            "/scrape/media?url=test.com&cursor=invalid-cursor&limit=10"
+        )
+
+        assert response.status_code == 200
+        data = json_body(response)
+        assert data["success"] is True
+
+    @pytest.mark.parametrize("path", ["/scrape", "/scrape/about"])
+    def test_legacy_endpoints_redirect(self, client, mocks, passive_soup, path):
         """Test that legacy endpoints redirect to new split endpoints."""
-        with patch(
-            "about_us_scraper_service.api.main_split.get_page_content"
-        ) as mock_get_content:
-            mock_soup = Mock()
-            mock_get_content.return_value = (mock_soup, "<html>test</html>", 200)
-
-            with patch(
-                "about_us_scraper_service.api.main_split.extract_company_info_programmatic"
-            ) as mock_extract:
-                mock_extract.return_value = {
-                    "title": "Test",
-                    "description": "Test",
-                    "content": "Test",
-                    "company_info": {"confidence": "medium"},
-                    "url": "https://test.com",
-                }
-
-                with patch(
-                    "about_us_scraper_service.api.main_split.find_about_pages"
-                ) as mock_find:
-                    mock_find.return_value = []
-
-                    # Test legacy /scrape endpoint
-                    response = client.get("/scrape?url=test.com")
-                    assert response.status_code == 200
-
-                    # Test legacy /scrape/about endpoint
-                    response = client.get("/scrape/about?url=test.com")
-                    assert response.status_code == 200
+        mocks.get_page_content_async.return_value = (
+            passive_soup,
+            "<html>test</html>",
+            200,
+        )
+        mocks.extract_company_info_programmatic.return_value = _MOCK_LEGACY_COMPANY_DATA
+        mocks.find_about_pages.return_value = []
+
+        response = client.get(path, params={"url": "test.com"})
+        assert response.status_code == 200
 
 
 class TestCursorPagination:
@@ -319,8 +418,6 @@ class TestCursorPagination:
 
     def test_cursor_encoding_decoding(self):
         """Test cursor encoding and decoding logic."""
-        from unittest.mock import Mock
-
         from about_us_scraper_service.api.main_split import extract_media_assets
 
         # Test cursor creation
@@ -335,39 +432,26 @@ class TestCursorPagination:
             cursor = result["pagination"]["next_cursor"]
             assert cursor is not None
 
-            # Decode the cursor
-            import base64
-
-            decoded = base64.b64decode(cursor).decode()
-            assert decoded.startswith("media:")
+            # Plain cursors are used as-is; legacy ones are base64 encoded
+            if cursor.startswith("m_"):
+                decoded = cursor
+            else:
+                decoded = base64.b64decode(cursor).decode()
+            assert decoded.startswith(("m_", "media:"))
 
             # Extract index
-            index = int(decoded.split(":")[1])
+            index = int(decoded.split("_" if decoded.startswith("m_") else ":")[1])
             assert index >= 0
 
     def test_cursor_pagination_continuity(self):
         """Test that cursor pagination maintains continuity."""
-        from unittest.mock import Mock
-
         from about_us_scraper_service.api.main_split import extract_media_assets
 
-        # Mock soup with multiple images
-        mock_soup = Mock()
-        mock_img1 = Mock()
-        mock_img1.get.side_effect = lambda x: (
-            "https://test.com/img1.png" if x == "src" else ""
-        )
-        mock_img1.name = "img"
-
-        mock_img2 = Mock()
-        mock_img2.get.side_effect = lambda x: (
-            "https://test.com/img2.png" if x == "src" else ""
-        )
-        mock_img2.name = "img"
+        mock_img1 = _mock_tag("img", {"src": "https://test.com/img1.png"})
+        mock_img2 = _mock_tag("img", {"src": "https://test.com/img2.png"})
 
-        mock_soup.find_all.side_effect = lambda x: (
-            [mock_img1, mock_img2] if x == "img" else []
-        )
+        mock_soup = Mock()
+        mock_soup.find_all = _find_all_from({"img": [mock_img1, mock_img2]})
 
         # First page
         result1 = extract_media_assets(mock_soup, "https://test.com", None, 1)
@@ -387,3 +471,19 @@ class TestCursorPagination:
                 result2["pagination"]["total_count"]
                 == result1["pagination"]["total_count"]
             )
+
+    def test_legacy_base64_cursor_accepted(self):
+        """Test that base64 "media:<index>" cursors from older clients still work."""
+        from about_us_scraper_service.api.main_split import extract_media_assets
+
+        mock_img1 = _mock_tag("img", {"src": "https://test.com/img1.png"})
+        mock_img2 = _mock_tag("img", {"src": "https://test.com/img2.png"})
+
+        mock_soup = Mock()
+        mock_soup.find_all = _find_all_from({"img": [mock_img1, mock_img2]})
+
+        legacy_cursor = base64.b64encode(b"media:1").decode()
+        result = extract_media_assets(mock_soup, "https://test.com", legacy_cursor, 1)
+
+        assert result["pagination"]["current_page_start"] == 1
+        assert result["pagination"]["next_cursor"] is None
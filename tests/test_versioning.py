@@ -0,0 +1,138 @@
+"""
+Tests for the API versioning middleware.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from api.utils import versioning
+from api.utils.versioning import VersionManager, setup_versioning
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Create a test client for an app with a single v1.0.0 handler."""
+    app = FastAPI()
+    version_manager = setup_versioning(app)
+
+    async def ping(request):
+        return Response(content=b"pong")
+
+    version_manager.register_handler("1.0.0", "/ping", ping)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("version", ["1.0.0-alpha", "0.9.0", "2.0.0"])
+def test_unsupported_version_rejected(client, version):
+    """Test that versions outside the supported range get a 400."""
+    response = client.get(f"/v{version}/ping")
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "Version not supported"}
+
+
+@pytest.mark.parametrize("version", ["1.0.0", "1.5.0-beta", "2.0.0-rc"])
+def test_supported_version_resolves_handler(client, version):
+    """Test that supported versions, prereleases included, reach the handler."""
+    response = client.get(f"/v{version}/ping")
+
+    assert response.status_code == 200
+    assert response.content == b"pong"
+    assert response.headers["X-API-Version"] == "1.0.0"
+
+
+@pytest.fixture
+def media_routes():
+    """Version manager with static and parameterized /media handlers."""
+    version_manager = VersionManager()
+    handlers = {
+        path: object()
+        for path in ["/media", "/media/{id}", "/media/featured", "/media/latest/info"]
+    }
+    for path, handler in handlers.items():
+        version_manager.register_handler("1.0.0", path, handler)
+    return version_manager, handlers
+
+
+def test_static_path_resolves(media_routes):
+    """Test that a plain registered path finds its handler."""
+    version_manager, handlers = media_routes
+
+    assert version_manager.get_handler("1.0.0", "/media") is handlers["/media"]
+    assert version_manager.get_handler("1.0.0", "/unknown") is None
+
+
+def test_parameterized_path_resolves(media_routes):
+    """Test that a "{id}" segment matches any value."""
+    version_manager, handlers = media_routes
+
+    assert version_manager.get_handler("1.0.0", "/media/42") is handlers["/media/{id}"]
+
+
+def test_static_segment_takes_precedence(media_routes):
+    """Test that a static segment wins over a parameterized sibling."""
+    version_manager, handlers = media_routes
+
+    handler = version_manager.get_handler("1.0.0", "/media/featured")
+    assert handler is handlers["/media/featured"]
+
+
+def test_dead_end_static_branch_falls_back_to_parameter(media_routes):
+    """Test that "{id}" still matches when a static prefix has no leaf."""
+    version_manager, handlers = media_routes
+
+    handler = version_manager.get_handler("1.0.0", "/media/latest")
+    assert handler is handlers["/media/{id}"]
+    handler = version_manager.get_handler("1.0.0", "/media/latest/info")
+    assert handler is handlers["/media/latest/info"]
+
+
+@pytest.mark.asyncio
+async def test_log_consumer_survives_logging_errors(monkeypatch):
+    """Test that a failing log call doesn't stop the queued request logger."""
+    logged = []
+
+    def flaky_log_event(event_type, data):
+        if not logged:
+            logged.append(None)
+            raise RuntimeError("log sink unavailable")
+        logged.append(data["requests"])
+
+    monkeypatch.setattr(versioning, "log_event", flaky_log_event)
+    queue = asyncio.Queue()
+    consumer = asyncio.create_task(versioning._log_consumer(queue))
+    try:
+        queue.put_nowait({"path": "/first"})
+        await asyncio.sleep(0)
+        queue.put_nowait({"path": "/second"})
+        await asyncio.sleep(0)
+    finally:
+        consumer.cancel()
+
+    assert logged == [None, [{"path": "/second"}]]
+
+
+def test_queued_request_events_are_timestamped(monkeypatch):
+    """Test that queued events keep the time of the request, not of the flush."""
+    logged = []
+    monkeypatch.setattr(
+        versioning,
+        "log_event",
+        lambda event_type, data: logged.extend(data["requests"]),
+    )
+
+    app = FastAPI()
+    version_manager = setup_versioning(app)
+
+    async def ping(request):
+        return Response(content=b"pong")
+
+    version_manager.register_handler("1.0.0", "/ping", ping)
+    with TestClient(app) as client:
+        client.get("/v1.0.0/ping")
+
+    assert [event["path"] for event in logged] == ["/ping"]
+    assert "timestamp" in logged[0]